@@ -0,0 +1,233 @@
+# ---------------------------------------------------------------
+# Monopoly Classic Bank Server
+# Python 3
+# Hosts any number of independent games of the classic banking unit
+# over a small HTTP interface, served with asyncio
+# ---------------------------------------------------------------
+
+import argparse
+import asyncio
+import itertools
+import json
+import traceback
+from urllib.parse import parse_qs, urlsplit
+
+import monopoly_classic_banking_unit as bank
+
+games = {} # games by id
+locks = {} # lock of each game, so that its batches run one after the other
+game_ids = itertools.count(1)
+
+# the games of the bank share the state of its module, which Game.run switches to the game it runs, so commands
+# must run on the event loop's thread with no await in between: never hand a batch to asyncio.to_thread or an
+# executor, since a game active in another thread would mix with the others (Game.run raises a RuntimeError
+# rather than let that happen). Long batches are instead run in chunks, yielding to other requests in between
+
+chunk_size = 2000 # commands carried out before letting other games' requests through
+max_body = 1 << 24 # largest request body accepted, in bytes
+
+statuses = {200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    """Class of errors answered with an HTTP status other than success"""
+
+    def __init__(self, status, message):
+        """initialises class object"""
+        super().__init__(message)
+        self.status = status
+
+
+"""Games"""
+
+
+def new_game():
+    """function to start a game, returning its id"""
+    game_id = str(next(game_ids))
+    games[game_id] = bank.Game()
+    locks[game_id] = asyncio.Lock()
+    return game_id
+
+
+def find_game(game_id):
+    """function to look a game up by id"""
+    if game_id not in games:
+        raise HTTPError(404, f"Game {game_id} not found.")
+    return games[game_id]
+
+
+def game_state(game):
+    """function to describe a game: each player's account and properties, and the properties still for sale"""
+    return {'players': {name: {'account': player.account, 'properties': player.properties,
+                               'buildings': player.prop_sets}
+                        for name, player in game.players.items()},
+            'available': game.avail_properties}
+
+
+async def run_commands(game_id, lines, stop_on_error=False):
+    """function to carry out a batch of commands on a game, a chunk at a time so that a long batch doesn't hold
+    up the other games; returns the number of commands carried out and the (line number, message) of failures"""
+    find_game(game_id)
+    n_commands, errors = 0, []
+    async with locks[game_id]:
+        game = find_game(game_id) # the game may have been ended while waiting for the lock
+        for start in range(0, len(lines), chunk_size):
+            executed, failed = game.run(lines[start:start + chunk_size], stop_on_error)
+            n_commands += executed
+            errors.extend((start + line_number, message) for line_number, message in failed)
+            if failed and stop_on_error:
+                break
+            await asyncio.sleep(0)
+    return n_commands, errors
+
+
+"""Requests"""
+
+# POST /games                       start a game
+# GET /games                        list the games
+# GET /games/<id>                   players, accounts and properties of a game
+# POST /games/<id>[?stop=1]         carry out the commands in the body (see run_batch), one per line
+# GET /games/<id>/history           history of a game, optionally ?player=<name> and ?investments=1
+# DELETE /games/<id>                end a game
+
+
+async def handle(method, path, query, body):
+    """function to answer a request, returning its status, content type and content"""
+    parts = [part for part in path.split('/') if part]
+    if not parts or parts[0] != 'games' or len(parts) > 3 or (len(parts) == 3 and parts[2] != 'history'):
+        raise HTTPError(404, f"No such resource: {path}")
+
+    if len(parts) == 1:
+        if method == 'POST':
+            return 201, {'game': new_game()}
+        elif method == 'GET':
+            return 200, {'games': list(games)}
+
+    elif len(parts) == 2:
+        game_id = parts[1]
+        if method == 'GET':
+            return 200, game_state(find_game(game_id))
+        elif method == 'POST':
+            try:
+                lines = body.decode().splitlines()
+            except UnicodeDecodeError:
+                raise HTTPError(400, 'Commands must be UTF-8 text.')
+            n_commands, errors = await run_commands(game_id, lines, query.get('stop') == '1')
+            return 200, {'executed': n_commands, 'errors': errors, 'accounts': find_game(game_id).accounts()}
+        elif method == 'DELETE':
+            find_game(game_id)
+            async with locks[game_id]:
+                find_game(game_id) # another request may have ended it first
+                del games[game_id], locks[game_id]
+            return 204, None
+
+    elif method == 'GET':
+        game = find_game(parts[1])
+        player = query.get('player')
+        if player is not None and player not in game.players:
+            raise HTTPError(404, f"Player {player} not found.")
+        return 200, '\n'.join(game.history(player, query.get('investments') == '1')) + '\n'
+
+    raise HTTPError(405, f"{method} not allowed on {path}")
+
+
+async def read_request(reader):
+    """function to read one request from a connection, returning its method, target, headers and body, or None
+    once the client has closed the connection"""
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, target, version = request_line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(400, 'Malformed request line.')
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length', 0)) if headers.get('content-length', '0').isdigit() else -1
+    if length < 0:
+        raise HTTPError(400, 'Invalid Content-Length.')
+    if length > max_body:
+        raise HTTPError(413, f"Request bodies are limited to {max_body} bytes.")
+    body = await reader.readexactly(length) if length else b''
+    return method, target, version, headers, body
+
+
+def response(status, content, keep_alive):
+    """function to encode a response; dicts and lists are sent as JSON and strings as plain text"""
+    if content is None:
+        data, content_type = b'', None
+    elif isinstance(content, str):
+        data, content_type = content.encode(), 'text/plain; charset=utf-8'
+    else:
+        data, content_type = json.dumps(content).encode(), 'application/json'
+
+    head = [f"HTTP/1.1 {status} {statuses[status]}", f"Content-Length: {len(data)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    if content_type:
+        head.append(f"Content-Type: {content_type}")
+    return ('\r\n'.join(head) + '\r\n\r\n').encode() + data
+
+
+async def serve_connection(reader, writer):
+    """function to answer the requests of one connection until the client closes it"""
+    try:
+        while True:
+            keep_alive = False
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                url = urlsplit(target)
+                query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                status, content = await handle(method, url.path, query, body)
+            except HTTPError as error:
+                status, content = error.status, {'error': str(error)}
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as error:
+                traceback.print_exc()
+                status, content = 500, {'error': f"{type(error).__name__}: {error}"}
+
+            writer.write(response(status, content, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass # client went away mid-request
+    finally:
+        writer.close()
+
+
+async def serve(host, port):
+    """function to run the server until interrupted"""
+    server = await asyncio.start_server(serve_connection, host, port)
+    print(f"Serving Monopoly games on http://{host}:{port}/games")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    """main function starting the server from the command line"""
+    parser = argparse.ArgumentParser(description='Host games of the Monopoly Classic banking unit over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8000, help='port to listen on')
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,214 @@
 # ---------------------------------------------------------------
 
 import datetime # importing module to save game history to external file
+import json # encoding events in the transaction log
+import os
+import time
 
 players = {}  # dictionary to hold all players (keys) and their class objects (values)
 property_sets = ['brown', 'light blue', 'pink', 'orange', 'red', 'yellow', 'green', 'dark blue'] # all property sets
 all_history, all_investment_history = [], [] # global lists to store histories
 
+initial_account = None # money each player starts the game with, once set up
+n_players = None # number of players the game is set up for, once set up
+phase = 'setup' # 'setup' until every player is created, 'play' until the game is ended, then 'end'
+net_worths = [] # players whose net worth has been recorded once the game is ended
+winner = None # player declared winner, if any
+
+games_dir = 'monopoly_games' # directory game histories and the transaction log of the game in progress are saved in
+log_path = os.path.join(games_dir, 'game_in_progress.log')
+snapshot_path = os.path.join(games_dir, 'game_in_progress.snapshot')
+snapshot_interval = 1000 # events logged between snapshots of the game in progress
+log = None # TransactionLog of the game in progress
+echo = True # whether statements are printed as they happen; off while a log is replayed
+history_offset = 0 # offset of the transaction log the histories start at; past 0 when restored from a snapshot
+
+
+"""Transaction log"""
+
+class TransactionLog:
+    """Class to append the events of a game to a write-ahead log file, one JSON list per line
+    events are committed (flushed and synced to disk) in groups: once group_size events are pending, once
+    group_delay seconds have passed since the last commit, or whenever commit is called, which the game does each
+    time it waits for a command"""
+
+    def __init__(self, filepath, group_size=64, group_delay=1.0):
+        """opens the log for appending
+        the log is binary, so that lines end in a single newline on every platform and its length is exact"""
+        self.filepath = filepath
+        self.group_size = group_size
+        self.group_delay = group_delay
+        self.file = open(filepath, 'ab')
+        self.length = self.file.tell() # bytes in the log, events not yet committed included
+        self.pending = 0 # events written but not yet committed
+        self.unsnapshotted = 0 # events written since the last snapshot
+        self.last_commit = time.monotonic()
+
+    def append(self, event):
+        """to append an event (the name of the operation followed by its arguments) to the log"""
+        self.file.write(json.dumps(event).encode() + b'\n')
+        self.length = self.file.tell()
+        self.pending += 1
+        self.unsnapshotted += 1
+        if self.pending >= self.group_size or time.monotonic() - self.last_commit >= self.group_delay:
+            self.commit()
+
+    def commit(self):
+        """to flush the pending events and sync them to disk"""
+        if self.pending:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.pending = 0
+        self.last_commit = time.monotonic()
+
+    def close(self):
+        """to commit the pending events and close the log"""
+        self.commit()
+        self.file.close()
+
+
+def log_event(*event):
+    """function to append an event to the transaction log of the game, if it is being logged"""
+    if log != None:
+        log.append(list(event))
+
+
+def read_log(filepath, offset=0):
+    """function to read the events of a transaction log from byte offset onwards
+    an event torn by a crash mid-write (which was never committed) ends the log; the file is truncated to the
+    last complete event so that new events are appended after it"""
+    events, length = [], offset
+    with open(filepath, 'rb') as file:
+        file.seek(offset)
+        for line in file:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                break
+            length += len(line)
+
+    if length < os.path.getsize(filepath):
+        with open(filepath, 'rb+') as file:
+            file.truncate(length)
+    return events
+
+
+def apply_event(event):
+    """function to apply an event of the transaction log to the game"""
+    operation, *args = event
+    if operation == 'start':
+        start_game()
+        return
+    elif operation == 'end':
+        stop_game()
+        return
+
+    name, *args = args
+    if operation == 'setup':
+        set_up_game(name)
+    elif operation == 'players':
+        set_up_players(name)
+    elif operation == 'create':
+        players[name] = Player(name)
+    elif operation == 'remove':
+        remove(name)
+    elif operation == 'net worth':
+        record_net_worth(name)
+    elif operation == 'winner':
+        declare_winner(name)
+    elif operation == 'rename':
+        players[name].rename(*args)
+        players[args[0]] = players.pop(name)
+    else: # Player methods
+        getattr(players[name], operation)(*args)
+
+
+def replay(filepath, offset=0):
+    """function to rebuild a game (players, accounts, buildings and histories) by applying the events of its
+    transaction log from byte offset onwards in order; returns the number of events replayed"""
+    global log, echo
+    events = read_log(filepath, offset)
+    log, echo = None, False # events being replayed are already logged, and were printed when they happened
+    try:
+        for event in events:
+            apply_event(event)
+    finally:
+        echo = True
+    return len(events)
+
+
+def take_snapshot(filepath=snapshot_path):
+    """function to save the state of the game, with the offset of the transaction log it is up to date with
+    the log is committed first, so the snapshot never covers events a crash could lose; the file is replaced
+    atomically, so a crash mid-save leaves the previous snapshot intact"""
+    log.commit()
+
+    # the histories are left out, since they grow with the game and the log already holds every event they come
+    # from; load_history rebuilds them when they are needed
+    snapshot = {'offset': log.length, 'initial_account': initial_account, 'n_players': n_players, 'phase': phase,
+                'players': [[player, player_class.name, player_class.account, player_class.prop_sets]
+                            for player, player_class in players.items()]}
+
+    with open(filepath + '.tmp', 'w') as file:
+        json.dump(snapshot, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(filepath + '.tmp', filepath)
+    log.unsnapshotted = 0
+
+
+def load_snapshot(filepath=snapshot_path):
+    """function to restore the state of the game from a snapshot, returning the offset of the transaction log
+    events need to be replayed from
+    the histories then start at that offset, until load_history fills in the events before it"""
+    global initial_account, n_players, phase, history_offset
+    with open(filepath) as file:
+        snapshot = json.load(file)
+
+    initial_account, n_players, phase = snapshot['initial_account'], snapshot['n_players'], snapshot['phase']
+    all_history.clear()
+    all_investment_history.clear()
+    players.clear()
+    for player, name, account, prop_sets in snapshot['players']:
+        player_class = Player.__new__(Player) # restoring the state as it was, without creating the player anew
+        player_class.name, player_class.account, player_class.prop_sets = name, account, prop_sets
+        player_class.history, player_class.investment_history = [], []
+        players[player] = player_class
+    history_offset = snapshot['offset']
+    return history_offset
+
+
+def restore():
+    """function to restore the game in progress from its latest snapshot, if any, and the tail of its transaction
+    log, so that the time restoring takes doesn't grow with the number of events in the log
+    returns the number of events replayed"""
+    offset = load_snapshot() if os.path.exists(snapshot_path) else 0
+    return replay(log_path, offset)
+
+
+def load_history():
+    """function to complete the histories of a game restored from a snapshot, which holds none, by replaying its
+    transaction log from the start; this rebuilds the very same game, histories included, and is only done when
+    the histories are listed or saved"""
+    global log, history_offset
+    if history_offset == 0:
+        return
+
+    game_log = log
+    game_log.commit() # so that the replay reads every event up to now
+    players.clear()
+    all_history.clear()
+    all_investment_history.clear()
+    net_worths.clear()
+    try:
+        replay(log_path)
+    finally:
+        log = game_log
+    history_offset = 0
+
+
 class Player:
     """Class to store all player variables"""
 
@@ -25,10 +228,13 @@ class Player:
 
         all_history.append(statement)
         self.history.append(statement)
-        print(statement + '\n')
-        
+        log_event('create', self.name)
+        if echo:
+            print(statement + '\n')
+
     def get_name(self):
-        return self.get_name()
+        """to return the player name, as printed"""
+        return self.name.capitalize()
 
     def set_money(self, new_money):
         """to reset account to a certain amount"""
@@ -39,7 +245,9 @@ class Player:
         self.history.append(statement)
         all_history.append(statement)
 
-        print(statement)
+        log_event('set_money', self.name, new_money)
+        if echo:
+            print(statement)
     def add_amount(self, amount):
         """to add amount to self.account"""
         self.account += amount
@@ -49,7 +257,9 @@ class Player:
         self.history.append(statement)
         all_history.append(statement)
 
-        print(statement)
+        log_event('add_amount', self.name, amount)
+        if echo:
+            print(statement)
 
     def subtract_amount(self, amount):
         """to subtract amount from self.account"""
@@ -60,7 +270,9 @@ class Player:
         self.history.append(statement)
         all_history.append(statement)
 
-        print(statement)
+        log_event('subtract_amount', self.name, amount)
+        if echo:
+            print(statement)
 
     def transfer_amount(self, amount, payee):
         """to transfer amount from self.account (payer account) to players[payee].account (payee account"""
@@ -73,18 +285,48 @@ class Player:
         players[payee].history.append(statement)
         all_history.append(statement)
 
-        print(statement)
+        log_event('transfer_amount', self.name, amount, payee)
+        if echo:
+            print(statement)
 
     def rename(self, new_name):
         """to rename player name"""
         statement = f"{self.get_name()} renamed to {new_name.lower().capitalize()}."
-        self.name = new_name.lower()
+        old_name, self.name = self.name, new_name.lower()
 
         self.history.append(statement)
         all_history.append(statement)
 
-        print(statement)
+        log_event('rename', old_name, self.name)
+        if echo:
+            print(statement)
 
+    def add_pass_go(self):
+        """to add money when player passes go"""
+        self.account += initial_account * 2 // 15 # 200 in a game starting with 1500, as in Monopoly Classic
+        statement = f"{self.get_name()} passed go. " \
+            f"{self.get_name()} now has {self.account}."
+
+        self.history.append(statement)
+        all_history.append(statement)
+
+        log_event('add_pass_go', self.name)
+        if echo:
+            print(statement)
+
+    def subtract_bail(self):
+        """to subtract bail when player gets out of jail"""
+        bail = initial_account // 30 # 50 in a game starting with 1500, as in Monopoly Classic
+        self.account -= bail
+        statement = f"{self.get_name()} paid {bail} bail. " \
+            f"{self.get_name()} now has {self.account}."
+
+        self.history.append(statement)
+        all_history.append(statement)
+
+        log_event('subtract_bail', self.name)
+        if echo:
+            print(statement)
 
     def invest_prop(self, prop_set, n_buildings, cost):
         """to invest in properties"""
@@ -106,7 +348,9 @@ class Player:
         self.investment_history.append(statement)
         all_investment_history.append(statement)
 
-        print(statement)
+        log_event('invest_prop', self.name, prop_set, n_buildings, cost)
+        if echo:
+            print(statement)
 
     def divest_prop(self, prop_set, n_buildings, profit):
         """to divest in properties"""
@@ -122,6 +366,75 @@ class Player:
         self.investment_history.append((statement))
         all_investment_history.append(statement)
 
+        log_event('divest_prop', self.name, prop_set, n_buildings, profit)
+        if echo:
+            print(statement)
+
+
+"""Game events"""
+
+def set_up_game(amount):
+    """function to set the amount of money each player starts the game with"""
+    global initial_account
+    initial_account = amount
+    all_history.append(f"Game set up with {initial_account} in each player's account.")
+    all_history.append('')
+    log_event('setup', amount)
+
+
+def set_up_players(number):
+    """function to record the number of players the game is set up for"""
+    global n_players
+    n_players = number
+    statement = f'Game set up for {n_players} players.\n'
+    all_history.append(statement)
+    log_event('players', n_players)
+    if echo:
+        print(statement)
+
+
+def start_game():
+    """function to record that every player has been created, so the game is played from then on"""
+    global phase
+    phase = 'play'
+    log_event('start')
+    if echo:
+        print('Game initiated.')
+
+
+def remove(player):
+    """function to remove player from the game"""
+    del players[player]
+    log_event('remove', player)
+    if echo:
+        print(f"Player {player.capitalize()} has been removed from the game.")
+
+
+def record_net_worth(player):
+    """function to save player's net worth (their account once assets are added up) to all history"""
+    statement = f"{player.capitalize()} has a net worth of {players[player].account}."
+    all_history.append(statement)
+    net_worths.append(player)
+    log_event('net worth', player)
+
+
+def stop_game():
+    """function to record that the game has been ended, so that only net worths and the winner are left to settle"""
+    global phase
+    phase = 'end'
+    log_event('end')
+    if echo:
+        print('Game ended.\n')
+
+
+def declare_winner(player):
+    """function to declare winner of the game"""
+    global winner
+    winner = player
+    statement = f"{winner.capitalize()} has won the game.\n"
+    all_history.append(statement)
+    log_event('winner', winner)
+    if echo:
         print(statement)
 
 
@@ -439,6 +752,7 @@ def list_accounts():
 def list_history():
     """function to list all history, investment history, player history, or player investment history"""
     options = ['all history', 'investment history', 'player history', 'player investment history']
+    load_history()
 
     # printing history types
     print(f"You may select any of the following game histories to display: {', '.join(options)}")
@@ -491,8 +805,7 @@ def remove_player():
 
     # removing player if decision confirmed
     if decision == 'y':
-        del players[player]
-        print(f"Player {player.capitalize()} has been removed from the game.")
+        remove(player)
 
 
 def rename_player():
@@ -536,7 +849,7 @@ def end_game():
 
     # if end game confirmed
     if decision == 'y':
-        print('Game ended.\n')
+        stop_game()
 
         # goes back to main() to break game loop
         return True
@@ -581,6 +894,9 @@ def net_worth():
     while True:  # game loop designed to run until net worth is calculated
         print()
 
+        # committing the events of the last command to the transaction log before waiting for the next one
+        log.commit()
+
         # taking command input
         while True:
             command = input('Enter command: ').lower()
@@ -604,9 +920,8 @@ def net_worth():
             players[player].subtract_amount(amount)
 
         if command == 'end calculation':
-            # printing net worth and saving to all history
-            statement = f"{player.capitalize()} has a net worth of {players[player].account}."
-            all_history.append(statement)
+            # saving net worth to all history
+            record_net_worth(player)
             break
 
 
@@ -614,61 +929,76 @@ def net_worth():
 def main():
     """main function running the game"""
 
-    global initial_account
+    global log
 
     # creating a filename (txt) to save all history to at end of game
     current_time = str(datetime.datetime.now()).split(' ')
 
     current_time.append('-'.join(current_time.pop().split(':'))) # removing colons from current_time
 
-    filepath = 'C:\\Users\\eshan\\Desktop\\python_projects\\general_programs\\monopoly_games\\' + \
-               'game_' + '_'.join(current_time) + '.txt'
+    os.makedirs(games_dir, exist_ok=True)
+    filepath = os.path.join(games_dir, 'game_' + '_'.join(current_time) + '.txt')
 
-    # determining amount of money game will start with
-    while True:
-        try:
-            initial_account = int(input("Please enter the amount of money "
-                                        "each player is to start the game with: "))
-        except ValueError:
-            print('Invalid input. Enter a number.\n')
-        else:
-            all_history.append(f"Game set up with {initial_account} in each player's account.")
-            all_history.append('')
-            print()
-            break
+    # resuming the game in progress if the bank stopped before it ended, at whichever stage it had reached
+    if os.path.exists(log_path):
+        n_events = restore()
+        log = TransactionLog(log_path)
+        print(f"Game in progress restored from {games_dir} ({n_events} events replayed).")
 
-    # determining number of players
-    while True:
-        try:
-            n_players = int(input("Please enter number of players: "))
-        except ValueError:
-            print('Invalid input. Enter a number.\n')
-        else:
-            statement = f'Game set up for {n_players} players.\n'
-            all_history.append(statement)
-            print(statement)
-            break
+    else:
+        if os.path.exists(snapshot_path): # left over from a game whose log is gone; it doesn't belong to this one
+            os.remove(snapshot_path)
+        log = TransactionLog(log_path)
+
+    # setting up game; every answer is logged as it is given, so a game restored midway through setting up is only
+    # asked the questions it has no answer to yet
+    if phase == 'setup':
+
+        # determining amount of money game will start with
+        while initial_account == None:
+            try:
+                amount = int(input("Please enter the amount of money "
+                                   "each player is to start the game with: "))
+            except ValueError:
+                print('Invalid input. Enter a number.\n')
+            else:
+                set_up_game(amount)
+                print()
 
-    # populating player dictionary
-    for i in range(1, n_players + 1):
-        player_name = input(f'Please enter name of player {i}: ').lower()
-        players[player_name] = Player(player_name)
+        # determining number of players
+        while n_players == None:
+            try:
+                number = int(input("Please enter number of players: "))
+            except ValueError:
+                print('Invalid input. Enter a number.\n')
+            else:
+                set_up_players(number)
 
-    print('Game initiated.')
+        # populating player dictionary
+        for i in range(len(players) + 1, n_players + 1):
+            player_name = input(f'Please enter name of player {i}: ').lower()
+            players[player_name] = Player(player_name)
 
-    # setting up game
+        start_game()
 
     command_menu = ['add', 'subtract', 'transfer', 'pass go', 'pay bail', 'invest', 'divest', 'split', 'list accounts',
                     'list history', 'remove player', 'rename player', 'end game']
 
-    print(f"Command options: ")
-    print(*command_menu, sep=', ')
+    if phase == 'play':
+        print(f"Command options: ")
+        print(*command_menu, sep=', ')
 
-    print("Note: to list command options at any time, enter 'help'.")
+        print("Note: to list command options at any time, enter 'help'.")
 
-    while True: # game loop designed to run until game is ended
+    while phase == 'play': # game loop designed to run until game is ended
         print()
 
+        # committing the events of the last command to the transaction log before waiting for the next one, and
+        # taking a snapshot every so often so that restoring the game only replays the tail of the log
+        log.commit()
+        if log.unsnapshotted >= snapshot_interval:
+            take_snapshot()
+
         # taking command input
         while True:
             command = input('Enter command: ').lower()
@@ -717,78 +1047,89 @@ def main():
             print(*command_menu, sep=', ')
 
         elif command == 'end game':
+            end_game() # ends the game loop if confirmed
+
+    # once the game is ended; a game restored after it was ended picks up here, keeping the net worths already
+    # recorded, and goes straight to saving its history if the winner was declared
+    log.commit()
+
+    if winner == None:
+        if net_worths:
+            print(f"Net worth already recorded for {', '.join(player.capitalize() for player in net_worths)}.\n")
+
+        # checking whether user wants to calculate net worth
+        while True:
+            check = input("Do you wish to calculate any player's net worth? (Y/N) ").lower()
+            if check.lower() not in ('y', 'n'):
+                print('Invalid input.\n')
+            else:
+                break
+
+        # if user does want to calculate net worth
+        if check == 'y':
+
+            while True:
 
-            # if player does indeed decide to end game
-            if end_game():
+                # calculate net worth for player
+                net_worth()
 
-                # checking whether user wants to calculate net worth
+                # check if user wishes to calculate net worth for any other players
                 while True:
-                    check = input("Do you wish to calculate any player's net worth? (Y/N) ").lower()
+                    check = input("Do you wish to calculate any other player's net worth? (Y/N) ").lower()
                     if check.lower() not in ('y', 'n'):
                         print('Invalid input.\n')
                     else:
                         break
 
-                # if user does want to calculate net worth
+                # if user wants to calculate net worth again
                 if check == 'y':
+                    continue
+                else:
+                    # breaks while loop for calculating net worth
+                    break
+
+        # printing final accounts
+        print('Final accounts read as follows: ')
+        list_accounts()
+        print()
 
-                    while True:
-
-                        # calculate net worth for player
-                        net_worth()
-
-                        # check if user wishes to calculate net worth for any other players
-                        while True:
-                            check = input("Do you wish to calculate any other player's net worth? (Y/N) ").lower()
-                            if check.lower() not in ('y', 'n'):
-                                print('Invalid input.\n')
-                            else:
-                                break
-
-                        # if user wants to calculate net worth again
-                        if check == 'y':
-                            continue
-                        else:
-                            # breaks while loop for calculating net worth
-                            break
-
-                # printing final accounts
-                print('Final accounts read as follows: ')
-                list_accounts()
-                print()
-
-                # checking whether user wishes to declare a winner
-                while True:
-                    check = input('Do you wish to declare a winner? (Y/N) ').lower()
-                    if check not in ('y', 'n'):
-                        print('Invalid input.')
-                    else:
-                        break
+        # checking whether user wishes to declare a winner
+        while True:
+            check = input('Do you wish to declare a winner? (Y/N) ').lower()
+            if check not in ('y', 'n'):
+                print('Invalid input.')
+            else:
+                break
 
-                # declaring winner
-                if check == 'y':
+        # declaring winner
+        if check == 'y':
 
-                    while True:
-                        winner = input('Declare winner: ').lower()
+            while True:
+                player = input('Declare winner: ').lower()
 
-                        if winner not in players:
-                            print(f"{winner.capitalize()} not found.")
+                if player not in players:
+                    print(f"{player.capitalize()} not found.")
 
-                        else:
-                            # printing winner and saving to all_history
-                            statement = f"{winner.capitalize()} has won the game.\n"
-                            all_history.append(statement)
-                            print(statement)
-                            break
+                else:
+                    # printing winner and saving to all_history
+                    declare_winner(player)
+                    break
 
-                # saving history to external txt file
-                file = open(filepath, 'w+')
-                for statement in all_history:
-                    file.write(statement + '\n')
+    # saving history to external txt file
+    load_history()
+    file = open(filepath, 'w+')
+    for statement in all_history:
+        file.write(statement + '\n')
+    file.close()
 
-                print(f"Game history saved to {filepath}.")
+    print(f"Game history saved to {filepath}.")
 
-                break # ending main game loop
+    # the game is over and its history saved, so its transaction log and snapshot are no longer needed;
+    # the snapshot goes first, so a crash in between never leaves it to be restored onto another log
+    log.close()
+    if os.path.exists(snapshot_path):
+        os.remove(snapshot_path)
+    os.remove(log_path)
 
 
 main()
@@ -4,9 +4,13 @@
 # A program that acts as a banking unit for a game of Monopoly Classic
 # ---------------------------------------------------------------
 
+import argparse # options of the batch command runner
 import datetime # importing module to save game history to external file
-
-players = {}
+import sys
+import threading # guarding the current game against concurrent use
+from collections import namedtuple # compact records of the game ledger
+from contextlib import contextmanager
+import monopoly_landing_probability_distribution as landing # landing probabilities for the expected rent table
 
 # dictionary to hold all property sets
 property_dict = {'brown' : ['Mediterranean Avenue', 'Baltic Avenue'],
@@ -27,8 +31,7 @@ avail_sets = list(property_sets)
 
 # list to hold all properties
 properties = tuple([p for p_set in property_sets for p in property_dict[p_set]])
-# list to hold all available properties
-avail_properties = list(properties)
+# the players and the properties still available are those of the current game (see Games)
 
 
 # mapping property prices to properties
@@ -37,7 +40,245 @@ prices_dict = {} # dictionary to hold all properties mapped with their prices
 for i in range(0, len(properties)):
     prices_dict[properties[i]] = prop_prices[i]
 
-all_history, all_investment_history = [], [] # global lists to store histories
+# board squares of each property, in the same order as properties
+prop_squares = [1, 3, 6, 8, 9, 11, 13, 14, 16, 18, 19, 21, 23, 24, 26, 27, 29, 31, 32, 34, 37, 39, 5, 15, 25, 35, 12, 28]
+squares_dict = {properties[i] : prop_squares[i] for i in range(0, len(properties))}
+
+# rents of each street: unimproved, with 1 to 4 houses, and with a hotel
+rents_dict = {'Mediterranean Avenue' : [2, 10, 30, 90, 160, 250], 'Baltic Avenue' : [4, 20, 60, 180, 320, 450],
+              'Oriental Avenue' : [6, 30, 90, 270, 400, 550], 'Vermont Avenue' : [6, 30, 90, 270, 400, 550],
+              'Connecticut Avenue' : [8, 40, 100, 300, 450, 600], 'St. Charles Place' : [10, 50, 150, 450, 625, 750],
+              'States Avenue' : [10, 50, 150, 450, 625, 750], 'Virginia Avenue' : [12, 60, 180, 500, 700, 900],
+              'St. James Place' : [14, 70, 200, 550, 750, 950], 'Tennessee Avenue' : [14, 70, 200, 550, 750, 950],
+              'New York Avenue' : [16, 80, 220, 600, 800, 1000], 'Kentucky Avenue' : [18, 90, 250, 700, 875, 1050],
+              'Indiana Avenue' : [18, 90, 250, 700, 875, 1050], 'Illinois Avenue' : [20, 100, 300, 750, 925, 1100],
+              'Atlantic Avenue' : [22, 110, 330, 800, 975, 1150], 'Ventnor Avenue' : [22, 110, 330, 800, 975, 1150],
+              'Marvin Gardens' : [24, 120, 360, 850, 1025, 1200], 'Pacific Avenue' : [26, 130, 390, 900, 1100, 1275],
+              'North Carolina Avenue' : [26, 130, 390, 900, 1100, 1275],
+              'Pennsylvania Avenue' : [28, 150, 450, 1000, 1200, 1400], 'Park Place' : [35, 175, 500, 1100, 1300, 1500],
+              'Boardwalk' : [50, 200, 600, 1400, 1700, 2000]}
+railroad_rents = [25, 50, 100, 200] # rent of each railroad when 1 to 4 railroads are owned
+utility_multipliers = [4, 10] # rent is this times the dice roll when 1 or 2 utilities are owned
+
+# cost of each building in each property set (the tiers used by invest_divest)
+building_costs = {'brown' : 50, 'light blue' : 50, 'pink' : 100, 'orange' : 100,
+                  'red' : 150, 'yellow' : 150, 'green' : 200, 'blue' : 200}
+
+# development levels of streets; unimproved streets in a complete set ('set') charge double rent
+street_levels = ('unimproved', 'set', '1 house', '2 houses', '3 houses', '4 houses', 'hotel')
+
+def building_cost(prop_set, n_buildings):
+    """function to compute what developing n_buildings buildings on a property set costs; divesting them returns
+    half of it"""
+    return n_buildings * building_costs[prop_set]
+
+
+rent_table = {} # (property or property set, development level) mapped to (expected rent per opponent turn, payback)
+
+def build_rent_table():
+    """function to fill rent_table from the exact landing distribution, in one pass over the probability vector
+    expected rent is per opponent turn; payback is the number of opponent turns rent takes to cover the total
+    cost of the property (or set) and its buildings"""
+    land_probabilities = [p / 100 for p in landing.solve()] # expected landings per turn on each square
+
+    # rent on each square for each development level, alongside the number of buildings on each street
+    levels = []
+    for prop in properties:
+        if prop in rents_dict:
+            rents = rents_dict[prop]
+            levels.append([(level, rent, n_buildings) for level, rent, n_buildings in
+                           zip(street_levels, [rents[0], 2 * rents[0]] + rents[1:], [0, 0, 1, 2, 3, 4, 5])])
+        elif prop in property_dict['railroads']:
+            levels.append([(f'{n} owned', rent, 0) for n, rent in enumerate(railroad_rents, 1)])
+        else: # utilities; the expected dice roll is 7
+            levels.append([(f'{n} owned', 7 * multiplier, 0) for n, multiplier in enumerate(utility_multipliers, 1)])
+
+    for prop, square, prop_levels in zip(properties, prop_squares, levels):
+        p = land_probabilities[square]
+        cost_per_building = building_costs.get(property_set(prop), 0)
+        for level, rent, n_buildings in prop_levels:
+            income = p * rent
+            cost = prices_dict[prop] + n_buildings * cost_per_building
+            rent_table[(prop, level)] = (income, cost / income)
+
+    # whole sets, developed evenly; railroads and utilities are counted with every property in the set owned
+    for prop_set in property_sets:
+        set_props = property_dict[prop_set]
+        set_levels = street_levels[1:] if prop_set in building_costs else [f'{len(set_props)} owned']
+        for level in set_levels:
+            income = sum(rent_table[(prop, level)][0] for prop in set_props)
+            cost = sum(rent_table[(prop, level)][0] * rent_table[(prop, level)][1] for prop in set_props)
+            rent_table[(prop_set, level)] = (income, cost / income)
+
+
+def property_set(prop):
+    """function to determine the property set a property belongs to"""
+    for prop_set, set_props in property_dict.items():
+        if prop in set_props:
+            return prop_set
+
+
+def expected_rent(name, level):
+    """function to look up the expected rent per opponent turn and the payback period (in opponent turns) of a
+    property or property set at a development level; the table is built on first use"""
+    if not rent_table:
+        build_rent_table()
+    return rent_table[(name, level)]
+
+
+def hit_chance(name, square, turns=3):
+    """function to compute the chance that an opponent starting their turn on square (a board index, 0 being GO)
+    lands on a property or property set within 1 to turns turns, as a list"""
+    if name in property_dict:
+        target = [squares_dict[prop] for prop in property_dict[name]]
+    else:
+        target = [squares_dict[name]]
+    return landing.hitWithin(target, turns, square)
+
+
+"""Ledger"""
+
+# every event of the game, in order, as compact records; the statements describing them are only rendered when a
+# history is listed or exported
+Event = namedtuple('Event', ['kind', 'player', 'other', 'amount', 'balance', 'other_balance', 'detail'])
+investment_events = ('buy', 'give', 'invest', 'divest') # events that also make up the investment histories
+game_events = ('start', 'players', 'net worth', 'winner') # events only in the history of the whole game
+echo = True # whether events are printed as they happen; turned off when the bank is driven without a terminal
+
+
+def record(kind, player=None, other=None, amount=0, balance=None, other_balance=None, detail=None, show=True):
+    """function to append an event to the ledger, printing its statement if show and echo are set; players are
+    given by id"""
+    event = Event(kind, player, other, amount, balance, other_balance, detail)
+    ledger.append(event)
+    if show and echo:
+        print(render_event(event, player_names))
+    return event
+
+
+def render_event(event, names):
+    """function to render the statement describing an event, given the names of the players at the time"""
+    kind, amount, balance, detail = event.kind, event.amount, event.balance, event.detail
+    player = names.get(event.player, '').capitalize()
+    other = names.get(event.other, '').capitalize()
+
+    if kind == 'create':
+        return f"Player {player} created."
+    elif kind == 'add':
+        return f"{amount} added to {player}'s account. It now has {balance}."
+    elif kind == 'subtract':
+        return f"{amount} subtracted from {player}'s account. It now has {balance}."
+    elif kind == 'transfer':
+        return f"{amount} transferred from {player}'s account to {other}'s account. " \
+            f"{player} and {other} have {balance} and {event.other_balance} respectively."
+    elif kind == 'rename':
+        return f"{player} renamed to {detail.capitalize()}."
+    elif kind == 'pass go':
+        return f"{player} passed go. {player} now has {balance}."
+    elif kind == 'buy':
+        return f"{player} bought {detail} for {amount}. {player} now has {balance} in their account."
+    elif kind == 'give':
+        return f"{player} gave {detail} to {other}."
+    elif kind == 'invest':
+        prop_set, n_buildings, total = detail
+        return f"{player} invested {amount} to develop {n_buildings} buildings in the {prop_set.lower()} set. " \
+            f"{player} now has {balance} in their account and {total} buildings on the {prop_set} property set."
+    elif kind == 'divest':
+        prop_set, n_buildings, total = detail
+        return f"{player} profited {amount} from removing {n_buildings} buildings in the {prop_set.lower()} set. " \
+            f"{player} now has {balance} in their account and {total} buildings on the {prop_set} property set.."
+    elif kind == 'start':
+        return f"Game set up with {amount} in each player's account.\n"
+    elif kind == 'players':
+        return f"Game set up for {amount} players.\n"
+    elif kind == 'net worth':
+        return f"{player} has a net worth of {balance}."
+    elif kind == 'winner':
+        return f"{player} has won the game.\n"
+
+
+def history(player=None, investments=False):
+    """generator rendering the statements of the ledger in order, optionally only those involving player (an id)
+    and only investments"""
+    names = {}
+    for event in ledger:
+        if event.kind == 'create':
+            names[event.player] = event.detail
+        if (player is None or player in (event.player, event.other) and event.kind not in game_events) and \
+                (not investments or event.kind in investment_events):
+            yield render_event(event, names)
+        if event.kind == 'rename':
+            names[event.player] = event.detail
+
+
+def export_history(filepath, player=None, investments=False):
+    """function to save a history (see history) to a text file"""
+    with open(filepath, 'w') as file:
+        for statement in history(player, investments):
+            file.write(statement + '\n')
+
+
+"""Games"""
+
+# all the state of a game lives in a Game; the module-level players, avail_properties, ledger and player_names are
+# those of the current game, which every function of the bank acts on. Switching games only rebinds these names,
+# so one process can keep any number of games and serve each in turn, but only one game at a time can be active:
+# Game.run and Game.history refuse to start while another game is active, in a nested call or in another thread
+game_lock = threading.Lock() # held while a game other than the terminal game is active
+
+
+class Game:
+    """Class to store the state of one game"""
+
+    def __init__(self):
+        """initialises class object"""
+        self.players = {} # players by name
+        self.avail_properties = list(properties) # properties still owned by the bank
+        self.ledger = [] # every event of the game, in order
+        self.player_names = {} # current name of each player, by player id
+
+    @contextmanager
+    def active(self):
+        """to make this game the current game for the duration of a with block, then switch back"""
+        if not game_lock.acquire(blocking=False):
+            raise RuntimeError('Another game is active; games share the state of the module, '
+                               'so only one can be active at a time, in a single thread')
+        previous_game = switch_game(self)
+        try:
+            yield self
+        finally:
+            switch_game(previous_game)
+            game_lock.release()
+
+    def run(self, lines, stop_on_error=False):
+        """to carry out a batch of commands on this game (see run_batch)"""
+        with self.active():
+            return run_batch(lines, stop_on_error)
+
+    def accounts(self):
+        """to return each player's account, by name"""
+        return {name: player.account for name, player in self.players.items()}
+
+    def history(self, player=None, investments=False):
+        """to return the statements of the game's history as a list (see history); player is a name"""
+        with self.active():
+            player_id = self.players[player].id if player is not None else None
+            return list(history(player_id, investments))
+
+
+def switch_game(game):
+    """function to make game the current game, returning the game that was current until then"""
+    global current_game, players, avail_properties, ledger, player_names
+    previous_game = current_game
+    current_game = game
+    players, avail_properties = game.players, game.avail_properties
+    ledger, player_names = game.ledger, game.player_names
+    return previous_game
+
+
+current_game = None
+switch_game(Game()) # the game played from the terminal
+
 
 class Player:
     """Class to store all player variables"""
@@ -46,88 +287,57 @@ class Player:
         """initialises class object"""
         self.name = name.lower()
         self.account = 1500
-        self.history = [] # variable to store transaction history of each player
-        self.investment_history = []  # variable to store investment history of each player
         self.prop_sets = {} # variable to store property sets (and buildings developed on each)
         self.properties = []
+        self.id = len(player_names) # identifies the player in the ledger, whatever they are renamed to
 
-        statement = f"Player {self.name.capitalize()} created."
-
-        all_history.append(statement)
-        self.history.append(statement)
-        print(statement + '\n')
+        player_names[self.id] = self.name
+        event = record('create', self.id, balance=self.account, detail=self.name, show=False)
+        if echo:
+            print(render_event(event, player_names) + '\n')
 
     def add_amount(self, amount):
         """to add amount to self.account"""
         self.account += amount
-        statement = f"{amount} added to {self.name.capitalize()}'s account. " \
-            f"It now has {self.account}."
-
-        self.history.append(statement)
-        all_history.append(statement)
-
-        print(statement)
+        record('add', self.id, amount=amount, balance=self.account)
 
     def subtract_amount(self, amount):
         """to subtract amount from self.account"""
         self.account -= amount
-        statement = f"{amount} subtracted from {self.name.capitalize()}'s account. " \
-            f"It now has {self.account}."
-
-        self.history.append(statement)
-        all_history.append(statement)
-
-        print(statement)
+        record('subtract', self.id, amount=amount, balance=self.account)
 
     def transfer_amount(self, amount, payee):
         """to transfer amount from self.account (payer account) to players[payee].account (payee account"""
         self.account -= amount
         players[payee].account += amount
-        statement = f"{amount} transferred from {self.name.capitalize()}'s account to {payee.capitalize()}'s account. " \
-            f"{self.name.capitalize()} and {payee.capitalize()} have {self.account} and {players[payee].account} respectively."
-
-        self.history.append(statement)
-        players[payee].history.append(statement)
-        all_history.append(statement)
-
-        print(statement)
+        record('transfer', self.id, players[payee].id, amount, self.account, players[payee].account)
 
     def rename(self, new_name):
         """to rename player name"""
-        statement = f"{self.name.capitalize()} renamed to {new_name.lower().capitalize()}."
+        record('rename', self.id, detail=new_name.lower())
         self.name = new_name.lower()
-
-        self.history.append(statement)
-        all_history.append(statement)
-
-        print(statement)
+        player_names[self.id] = self.name
 
     def add_pass_go(self):
         """to add money when player passes go"""
         self.account += 200 # to adjust for different versions of Monopoly
-        statement = f"{self.name.capitalize()} passed go. " \
-            f"{self.name.capitalize()} now has {self.account}."
-
-        self.history.append(statement)
-        all_history.append(statement)
-
-        print(statement)
+        record('pass go', self.id, amount=200, balance=self.account)
 
     def buy_prop(self, prop, cost):
         # to buy a given property
         self.account -= cost
-        statement = f"{self.name.capitalize()} bought {prop} for {cost}. " \
-            f"{self.name.capitalize()} now has {self.account} in their account."
 
         self.properties.append(prop)
         avail_properties.remove(prop)
 
-        self.history.append(statement)
-        all_history.append(statement)
-        self.investment_history.append(statement)
-        all_investment_history.append(statement)
+        record('buy', self.id, amount=cost, balance=self.account, detail=prop)
 
-        print(statement)
+    def give_prop(self, prop, recipient):
+        """to hand a property over to players[recipient], as part of a trade"""
+        self.properties.remove(prop)
+        players[recipient].properties.append(prop)
+
+        record('give', self.id, players[recipient].id, detail=prop)
 
 
     def invest_prop(self, prop_set, n_buildings, cost):
@@ -140,33 +350,16 @@ class Player:
         else:
             self.prop_sets[prop_set] = n_buildings
 
-
-        statement = f"{self.name.capitalize()} invested {cost} to develop {n_buildings} buildings " \
-            f"in the {prop_set.lower()} set. {self.name.capitalize()} now has {self.account} in their account " \
-            f"and {self.prop_sets[prop_set]} buildings on the {prop_set} property set."
-
-        self.history.append(statement)
-        all_history.append(statement)
-        self.investment_history.append(statement)
-        all_investment_history.append(statement)
-
-        print(statement)
+        record('invest', self.id, amount=cost, balance=self.account,
+               detail=(prop_set, n_buildings, self.prop_sets[prop_set]))
 
     def divest_prop(self, prop_set, n_buildings, profit):
         """to divest in properties"""
         self.account += profit # profit computed by invest_divest function
         self.prop_sets[prop_set] -= n_buildings # removing buildings from prop_sets
 
-        statement = f"{self.name.capitalize()} profited {profit} from removing {n_buildings} buildings " \
-            f"in the {prop_set.lower()} set. {self.name.capitalize()} now has {self.account} in their account " \
-            f"and {self.prop_sets[prop_set]} buildings on the {prop_set} property set.."
-
-        self.history.append(statement)
-        all_history.append(statement)
-        self.investment_history.append((statement))
-        all_investment_history.append(statement)
-
-        print(statement)
+        record('divest', self.id, amount=profit, balance=self.account,
+               detail=(prop_set, n_buildings, self.prop_sets[prop_set]))
 
 
 """General functions"""
@@ -321,14 +514,14 @@ def invest_divest(command):
 
     # printing according to command
     if command == 'invest':
-        print(f"You may invest in any of the following property sets: {', '.join(property_sets)}")
+        print(f"You may invest in any of the following property sets: {', '.join(building_costs)}")
     elif command == 'divest':
         print(f"You may divest from any of the following property sets: {', '.join(players[player].prop_sets)}")
 
     # determining property set
     while True:
         prop_set = input('Select property set: ').lower()
-        if prop_set not in property_sets:
+        if prop_set not in building_costs: # railroads and utilities take no buildings
             print('Property set not found.')
             continue
         else:
@@ -383,17 +576,7 @@ def invest_divest(command):
                 return
 
     # determining cost/profit
-    multiplier = 100 # to calculate unit cost dependent on Monopoly version
-    amount = 0 # to call of PyCharm's red flag about amount and n_buildings potentially not being defined
-
-    if prop_set in ('brown', 'light blue'):
-        amount = n_buildings * multiplier // 2 # costs 50 per house (or 500k) in first row
-    elif prop_set in ('pink', 'orange'):
-        amount = n_buildings * multiplier # costs 100 per house in second row
-    elif prop_set in ('red', 'yellow'):
-        amount = int(n_buildings * 1.5 * multiplier) # costs 150 per house in third row
-    elif prop_set in ('green', 'dark blue'):
-        amount = n_buildings * 2 * multiplier # costs 200 per house in fourth row
+    amount = building_cost(prop_set, n_buildings)
 
     # if player wishes to invest
     if command == 'invest':
@@ -608,12 +791,12 @@ def list_history():
 
     # if all history requested
     if history_type == 'all history':
-        for line in all_history:
+        for line in history():
             print(line)
 
     # if all investment history requested
     elif history_type == 'investment history':
-        for line in all_investment_history:
+        for line in history(investments=True):
             print(line)
 
     # if player history or player investment history requested
@@ -624,12 +807,12 @@ def list_history():
 
         # if player history requested
         if history_type == 'player history':
-            for line in players[player].history:
+            for line in history(players[player].id):
                 print(line)
 
         # if player investment history requested
         elif history_type == 'player investment history':
-            for line in players[player].investment_history:
+            for line in history(players[player].id, investments=True):
                 print(line)
 
 
@@ -759,18 +942,235 @@ def net_worth():
             players[player].subtract_amount(amount)
 
         if command == 'end calculation':
-            # printing net worth and saving to all history
-            statement = f"{player.capitalize()} has a net worth of {players[player].account}."
-            all_history.append(statement)
+            # saving net worth to the ledger
+            record('net worth', players[player].id, balance=players[player].account, show=False)
             break
 
 
 
+"""Headless commands"""
+
+# the same operations as the command menu, taking their arguments directly instead of prompting for them and
+# raising ValueError instead of printing when a command can't be carried out
+
+def find_player(player):
+    """function to look a player up by name"""
+    if player not in players:
+        raise ValueError(f"Player {player} not found.")
+    return players[player]
+
+
+def check_funds(player, amount):
+    """function to check that a player can pay amount"""
+    if amount > players[player].account:
+        raise ValueError(f"Insufficient funds in {player.capitalize()}'s account. "
+                         f"{player.capitalize()} currently has {players[player].account}.")
+
+
+def check_amount(amount):
+    """function to check that an amount is not negative"""
+    if amount < 0:
+        raise ValueError(f"Invalid amount {amount}; amounts cannot be negative.")
+
+
+def check_buildings(n_buildings):
+    """function to check that a number of buildings to develop or divest is positive"""
+    if n_buildings <= 0:
+        raise ValueError(f"Invalid number of buildings {n_buildings}; enter a positive number.")
+
+
+def create_command(player):
+    """function to add a player to the game"""
+    if player in players:
+        raise ValueError(f"{player.capitalize()} is already in use.")
+    players[player] = Player(player)
+
+
+def add_command(player, amount):
+    """function to add amount to a player's account"""
+    find_player(player)
+    check_amount(amount)
+    players[player].add_amount(amount)
+
+
+def subtract_command(player, amount):
+    """function to subtract amount from a player's account"""
+    find_player(player)
+    check_amount(amount)
+    check_funds(player, amount)
+    players[player].subtract_amount(amount)
+
+
+def transfer_command(payer, payee, amount):
+    """function to transfer amount from payer to payee"""
+    find_player(payer)
+    find_player(payee)
+    check_amount(amount)
+    check_funds(payer, amount)
+    players[payer].transfer_amount(amount, payee)
+
+
+def pass_go_command(player):
+    """function to add money when player passes go"""
+    find_player(player).add_pass_go()
+
+
+def buy_command(player, prop):
+    """function to buy a property at its price"""
+    find_player(player)
+    if prop not in properties:
+        raise ValueError(f"{prop} is not a valid property name.")
+    if prop not in avail_properties:
+        raise ValueError('Cannot purchase; property owned by another player.')
+    check_funds(player, prices_dict[prop])
+    players[player].buy_prop(prop, prices_dict[prop])
+
+
+def invest_command(player, prop_set, n_buildings):
+    """function to develop n_buildings buildings on a property set"""
+    find_player(player)
+    if prop_set not in building_costs:
+        raise ValueError(f"Cannot develop buildings on {prop_set}.")
+    check_buildings(n_buildings)
+    limit = 10 if len(property_dict[prop_set]) == 2 else 15 # five buildings on each property of the set
+    if n_buildings + players[player].prop_sets.get(prop_set, 0) > limit:
+        raise ValueError(f"Cannot develop {n_buildings} buildings; total buildings would exceed limit.")
+    cost = building_cost(prop_set, n_buildings)
+    check_funds(player, cost)
+    players[player].invest_prop(prop_set, n_buildings, cost)
+
+
+def divest_command(player, prop_set, n_buildings):
+    """function to sell n_buildings buildings on a property set back to the bank, for half what they cost"""
+    find_player(player)
+    if prop_set not in building_costs:
+        raise ValueError(f"Cannot divest buildings from {prop_set}.")
+    if prop_set not in players[player].prop_sets:
+        raise ValueError(f"Cannot divest; {player.capitalize()} currently has no buildings on {prop_set}.")
+    check_buildings(n_buildings)
+    existing_buildings = players[player].prop_sets[prop_set]
+    if n_buildings > existing_buildings:
+        raise ValueError(f"Player cannot divest {n_buildings} buildings; "
+                         f"player only has {existing_buildings} buildings.")
+    players[player].divest_prop(prop_set, n_buildings, building_cost(prop_set, n_buildings) // 2)
+
+
+def split_command(player, direction, amount):
+    """function to have a player pay amount to ('pay') or receive amount from ('receive') each other player"""
+    find_player(player)
+    check_amount(amount)
+    others = [other for other in players if other != player]
+    if direction == 'pay':
+        check_funds(player, amount * len(others))
+        for payee in others:
+            players[player].transfer_amount(amount, payee)
+    elif direction == 'receive':
+        for payer in others:
+            check_funds(payer, amount)
+        for payer in others:
+            players[payer].transfer_amount(amount, player)
+    else:
+        raise ValueError("Invalid input. Enter 'pay' or 'receive'.")
+
+
+def trade_command(player_1, player_2, properties_1, amount_1, properties_2, amount_2):
+    """function to trade properties and money between two players; each player hands over their properties
+    (lists of names) and pays their amount to the other; everything is checked before anything changes hands"""
+    if player_1 == player_2:
+        raise ValueError(f"{player_1.capitalize()} cannot trade with themselves.")
+    for player, offered, amount in ((player_1, properties_1, amount_1), (player_2, properties_2, amount_2)):
+        find_player(player)
+        check_amount(amount)
+        if len(set(offered)) != len(offered):
+            raise ValueError(f"{player.capitalize()} offers the same property more than once.")
+        for prop in offered:
+            if prop not in players[player].properties:
+                raise ValueError(f"{prop} is not owned by {player.capitalize()}.")
+        check_funds(player, amount)
+
+    for prop in properties_1:
+        players[player_1].give_prop(prop, player_2)
+    for prop in properties_2:
+        players[player_2].give_prop(prop, player_1)
+    if amount_1:
+        players[player_1].transfer_amount(amount_1, player_2)
+    if amount_2:
+        players[player_2].transfer_amount(amount_2, player_1)
+
+
+def rename_command(player, new_name):
+    """function to change the name of a player"""
+    find_player(player)
+    if new_name in players:
+        raise ValueError(f'{new_name.capitalize()} is already in use.')
+    players[player].rename(new_name)
+    players[new_name] = players.pop(player)
+
+
+def remove_command(player):
+    """function to remove a player from the game"""
+    find_player(player)
+    del players[player]
+
+
+def props(text):
+    """function to parse a '+'-separated list of property names (empty for none)"""
+    return [prop.strip() for prop in text.split('+')] if text.strip() else []
+
+
+# batch commands: the function carrying each out, and how to convert each of its arguments from text
+batch_commands = {'create': (create_command, (str,)),
+                  'add': (add_command, (str, int)),
+                  'subtract': (subtract_command, (str, int)),
+                  'transfer': (transfer_command, (str, str, int)),
+                  'pass go': (pass_go_command, (str,)),
+                  'buy': (buy_command, (str, str)),
+                  'invest': (invest_command, (str, str, int)),
+                  'divest': (divest_command, (str, str, int)),
+                  'split': (split_command, (str, str, int)),
+                  'trade': (trade_command, (str, str, props, int, props, int)),
+                  'rename': (rename_command, (str, str)),
+                  'remove': (remove_command, (str,))}
+
+
+def run_batch(lines, stop_on_error=False):
+    """function to carry out a batch of commands without prompting or printing each of them
+    lines is an iterable of lines (a list, an open file, standard input), one command per line: the command name
+    followed by its arguments, separated by commas, with player names in lower case and property names as listed;
+    blank lines and lines starting with '#' are skipped. Every command is recorded in the ledger as usual
+    returns the number of commands carried out and a list of (line number, error message) for those that failed;
+    with stop_on_error, the batch stops at the first failure"""
+    global echo
+    echo, previous_echo = False, echo
+    n_commands, errors = 0, []
+    try:
+        for line_number, line in enumerate(lines, 1):
+            fields = line.rstrip('\n').split(',')
+            name = fields[0].strip()
+            if not name or name[0] == '#':
+                continue
+            try:
+                if name not in batch_commands:
+                    raise ValueError(f"Unknown command: {name}")
+                function, converters = batch_commands[name]
+                if len(fields) - 1 != len(converters):
+                    raise ValueError(f"{name} takes {len(converters)} arguments, not {len(fields) - 1}")
+                function(*[convert(field.strip()) for convert, field in zip(converters, fields[1:])])
+            except ValueError as error:
+                errors.append((line_number, str(error)))
+                if stop_on_error:
+                    break
+            else:
+                n_commands += 1
+    finally:
+        echo = previous_echo
+    return n_commands, errors
+
+
 def main():
     """main function running the game"""
 
-    all_history.append("Game set up with 1500 in each player's account.")
-    all_history.append('')
+    record('start', amount=1500, show=False)
     print()
 
     # determining number of players
@@ -780,9 +1180,7 @@ def main():
         except ValueError:
             print('Invalid input. Enter a number.\n')
         else:
-            statement = f'Game set up for {n_players} players.\n'
-            all_history.append(statement)
-            print(statement)
+            record('players', amount=n_players)
             break
 
     # populating player dictionary
@@ -917,13 +1315,33 @@ def main():
                             print(f"{winner.capitalize()} not found.")
 
                         else:
-                            # printing winner and saving to all_history
-                            statement = f"{winner.capitalize()} has won the game.\n"
-                            all_history.append(statement)
-                            print(statement)
+                            # printing winner and saving to the ledger
+                            record('winner', players[winner].id)
                             break
 
                 break # ending main game loop
 
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Banking unit for a game of Monopoly Classic.')
+    parser.add_argument('batch', nargs='?', help="file of commands to carry out without prompts ('-' to read them "
+                                                 "from standard input); without it, the interactive game is run")
+    parser.add_argument('--stop-on-error', action='store_true', help='stop the batch at the first failed command')
+    parser.add_argument('--history', help='file to save the history of the batch to')
+    args = parser.parse_args()
+
+    if args.batch is None:
+        main()
+    else:
+        if args.batch == '-':
+            n_commands, errors = run_batch(sys.stdin, args.stop_on_error)
+        else:
+            with open(args.batch) as file:
+                n_commands, errors = run_batch(file, args.stop_on_error)
+
+        for line_number, message in errors:
+            print(f"Line {line_number}: {message}", file=sys.stderr)
+        print(f"Carried out {n_commands} commands ({len(errors)} failed).")
+        list_accounts()
+        if args.history:
+            export_history(args.history)
\ No newline at end of file
@@ -0,0 +1,164 @@
+# ---------------------------------------------------------------
+# Monopoly Probability Distribution Benchmarks
+# Python 3
+# Times the dice, card and movement hot paths of the landing simulator
+# ---------------------------------------------------------------
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from statistics import quantiles
+
+import monopoly_landing_probability_distribution as landing
+
+sizes = (10 ** 3, 10 ** 4, 10 ** 5) # numbers of rolls the full simulation loop is timed for
+
+
+def latencyStats(latencies):
+    """function to summarise a list of latencies (in seconds) as mean and percentiles in microseconds"""
+    cuts = quantiles(latencies, n=100)
+    return({'mean_us': sum(latencies) / len(latencies) * 10 ** 6,
+            'p50_us': cuts[49] * 10 ** 6,
+            'p90_us': cuts[89] * 10 ** 6,
+            'p99_us': cuts[98] * 10 ** 6})
+
+
+def benchmarkCall(function, nCalls):
+    """function to time nCalls individual calls of function, returning calls per second and latency percentiles"""
+    latencies = []
+    clock = time.perf_counter
+    for i in range(nCalls):
+        start = clock()
+        function()
+        latencies.append(clock() - start)
+
+    result = latencyStats(latencies)
+    result['calls'] = nCalls
+    result['calls_per_second'] = nCalls / sum(latencies)
+    return(result)
+
+
+def benchmarkThrows(nThrows, repeats):
+    """function to time the throw path of Simulation.run, which reads throw codes straight from a DiceBuffer's
+    block and refills it when used up, over repeats runs of nThrows throws; reports throws per second"""
+    dice = landing.DiceBuffer()
+    runTimes = []
+    for i in range(repeats):
+        block, cursor = dice.block, dice.cursor
+        start = time.perf_counter()
+        for throw in range(nThrows):
+            if cursor == len(block):
+                dice.refill()
+                block, cursor = dice.block, 0
+            code = block[cursor]
+            cursor += 1
+        runTimes.append(time.perf_counter() - start)
+        dice.cursor = cursor
+
+    return({'throws': nThrows, 'repeats': repeats, 'throws_per_second': nThrows / min(runTimes)})
+
+
+def benchmarkSimulation(nRolls, repeats):
+    """function to time repeats full runs of the simulation loop for nRolls rolls
+    reports rolls (turns) and moves (landings counted) per second, the run time percentiles and peak memory"""
+    runTimes, moves = [], 0
+    for i in range(repeats):
+        start = time.perf_counter()
+        landCount = landing.simulate(nRolls)
+        runTimes.append(time.perf_counter() - start)
+        moves = sum(landCount)
+
+    # measuring memory separately, since tracing allocations slows the loop down
+    tracemalloc.start()
+    landing.simulate(nRolls)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    best = min(runTimes)
+    result = {'rolls': nRolls,
+              'repeats': repeats,
+              'rolls_per_second': nRolls / best,
+              'moves_per_second': moves / best,
+              'peak_memory_bytes': peak}
+    if repeats >= 2:
+        cuts = quantiles(runTimes, n=100)
+        result.update({'p50_seconds': cuts[49], 'p90_seconds': cuts[89], 'p99_seconds': cuts[98]})
+    return(result)
+
+
+def runBenchmarks(sizes=sizes, nCalls=10 ** 5, repeats=5):
+    """function to run the whole suite, returning the results as a dictionary ready to be saved as JSON"""
+    cChestCards = landing.Deck(landing.cChestDeck)
+    chanceCards = landing.Deck(landing.chanceDeck)
+    dice = landing.DiceBuffer()
+
+    return({'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'throws': benchmarkThrows(nCalls * 10, repeats),
+            'diceBuffer': benchmarkCall(dice.draw, nCalls),
+            'cChest': benchmarkCall(lambda: landing.cChest(cChestCards), nCalls),
+            'chance': benchmarkCall(lambda: landing.chance(chanceCards), nCalls),
+            'simulate': [benchmarkSimulation(nRolls, repeats) for nRolls in sizes]})
+
+
+def compare(results, baseline, tolerance=0.1):
+    """function to compare results with the results of an earlier run
+    returns a list of regressions: throughputs that dropped by more than tolerance (as a fraction)"""
+    regressions = []
+
+    if 'throws' in baseline:
+        old, new = baseline['throws']['throws_per_second'], results['throws']['throws_per_second']
+        if new < old * (1 - tolerance):
+            regressions.append(f"throws: {old:.0f} -> {new:.0f} throws per second")
+
+    for name in ('diceBuffer', 'cChest', 'chance'):
+        if name not in baseline:
+            continue
+        old, new = baseline[name]['calls_per_second'], results[name]['calls_per_second']
+        if new < old * (1 - tolerance):
+            regressions.append(f"{name}: {old:.0f} -> {new:.0f} calls per second")
+
+    oldRuns = {run['rolls']: run for run in baseline['simulate']}
+    for run in results['simulate']:
+        if run['rolls'] in oldRuns:
+            old, new = oldRuns[run['rolls']]['rolls_per_second'], run['rolls_per_second']
+            if new < old * (1 - tolerance):
+                regressions.append(f"simulate({run['rolls']}): {old:.0f} -> {new:.0f} rolls per second")
+
+    return(regressions)
+
+
+def main():
+    """main function running the benchmarks from the command line"""
+    parser = argparse.ArgumentParser(description='Benchmark the landing simulator hot paths.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(sizes), help='numbers of rolls to simulate')
+    parser.add_argument('--calls', type=int, default=10 ** 5, help='calls timed per function')
+    parser.add_argument('--repeats', type=int, default=5, help='runs timed per simulation size')
+    parser.add_argument('--output', help='file to save the JSON results to (default: print them)')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='allowed fractional drop in throughput')
+    args = parser.parse_args()
+
+    results = runBenchmarks(args.sizes, args.calls, args.repeats)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print('Regression:', regression, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# ---------------------------------------------------------------
+# Monopoly Probability Distribution Command Line
+# Python 3
+# Computes the landing distribution and prints or saves it
+# ---------------------------------------------------------------
+
+import argparse
+import json
+
+import monopoly_landing_probability_distribution as landing
+
+
+def seedType(text):
+    """function to convert the --seed option, which must be a non-negative integer (as the batched engine requires)"""
+    if not text.isdigit():
+        raise argparse.ArgumentTypeError(f"invalid seed {text!r}, expected a non-negative integer")
+    return(int(text))
+
+
+def main(argv=None):
+    """main function computing the landing distribution from the command line"""
+    parser = argparse.ArgumentParser(description='Compute the probability of landing on each Monopoly square.')
+    parser.add_argument('--rolls', type=int, default=landing.rolls, help='number of rolls/turns to simulate')
+    parser.add_argument('--method', choices=landing.methods, default='simulate', help='how to compute it')
+    parser.add_argument('--seed', type=seedType, help='seed of the random generator, for reproducible runs')
+    parser.add_argument('--reshuffle', action='store_true', help='reshuffle the card piles once they run out')
+    parser.add_argument('--workers', type=int, help='worker processes of the parallel simulation')
+    parser.add_argument('--json', action='store_true', help='print the result as JSON')
+    parser.add_argument('--output', help='file to save the JSON result to')
+    args = parser.parse_args(argv)
+
+    result = landing.landingDistribution(args.rolls, args.method, args.seed, args.reshuffle, args.workers)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(result.asDict(), file, indent=2)
+    elif args.json:
+        print(json.dumps(result.asDict(), indent=2))
+    else:
+        for square, label, percentage in result.rows():
+            print(square, label, percentage)
+        if result.rolls != None:
+            print(f"Simulated {result.rolls} rolls in {result.elapsed:.3f} seconds.")
+        else:
+            print(f"Solved exactly in {result.elapsed:.3f} seconds.")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,66 @@
 # Based on Problem 84 of Project Euler
 # ---------------------------------------------------------------
 
-import timer
+import csv
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+from array import array
 from random import randint
 
+# NumPy, multiprocessing and statistics are imported on first use by the functions that need them, keeping the
+# import of this module cheap and free of side effects
+np = None # NumPy, once imported by importNumpy
+
 rolls = 10 ** 4 # total number of rolls/turns
 
+positions = {0: "GO", 1: "A1", 2: "CC1", 3: "A2", 4: "T1", 5: "R1", 6: "B1", 7: "CH1", 8: "B2", 9: "B3", 10: "JAIL",
+             11: "C1", 12: "U1", 13: "C2", 14: "C3", 15: "R2", 16: "D1", 17: "CC2", 18: "D2", 19: "D3", 20: "FP",
+             21: "E1", 22: "CH2", 23: "E2", 24: "E3", 25: "R3", 26: "F1", 27: "F2", 28: "U2", 29: "F3", 30: "G2J",
+             31: "G1", 32: "G2", 33: "CC3", 34: "G3", 35: "R4", 36: "CH3", 37: "H1", 38: "T2", 39: "H2"}
+
+cChestDeck = ('GO', 'JAIL') # two out of sixteen cards
+chanceDeck = ('GO', 'JAIL', 'C1', 'E3', 'H2', 'R1', 'R', 'R', 'U', -3) # ten out of sixteen cards
+    # R = next railway station
+    # U = next utility
+    # -3 = go back three spaces
+
+railwayStations = (6, 16, 26, 36) # squares the "R" card looks for
+utilities = (12, 28) # squares the "U" card looks for
+
+# square type codes
+NORMAL, GO_TO_JAIL, COMMUNITY_CHEST, CHANCE = 0, 1, 2, 3
+
+def compileBoard(positions, railwayStations=railwayStations, utilities=utilities):
+    """function to compile the board into lookup tables once, so that moves need no string matching or scanning
+    returns the type code of each square, the next railway station and next utility from each square (None if
+    there is none before the end of the board) and a map of square labels to square indices"""
+    squareTypes, nextRailway, nextUtility = [], [], []
+    squareIndex = {}
+
+    for square in range(0, len(positions)):
+        name = positions[square]
+        squareIndex[name] = square
+
+        if name == "G2J":
+            squareTypes.append(GO_TO_JAIL)
+        elif "CC" in name:
+            squareTypes.append(COMMUNITY_CHEST)
+        elif "CH" in name:
+            squareTypes.append(CHANCE)
+        else:
+            squareTypes.append(NORMAL)
+
+        nextRailway.append(next((i for i in range(square, len(positions)) if i in railwayStations), None))
+        nextUtility.append(next((i for i in range(square, len(positions)) if i in utilities), None))
+
+    return(squareTypes, nextRailway, nextUtility, squareIndex)
+
+squareTypes, nextRailway, nextUtility, squareIndex = compileBoard(positions)
+
 def roll():
     """function to generate roll of dice"""
     moves, condition = [], True
@@ -23,106 +78,1553 @@ def roll():
             moves[2] = "G2J" # changes third move to "Go to Jail" if three doubles are rolled
     return(moves)
 
+# a throw of two dice is coded as (d1 - 1) * 6 + (d2 - 1); 252 = 7 * 36, so bytes from 0 to 251 map uniformly onto
+# the 36 codes and bytes from 252 to 255 are rejected
+pairCodes = bytes(b % 36 for b in range(0, 252)) + bytes(4)
+rejectedBytes = bytes(range(252, 256))
+pairSums = [code // 6 + code % 6 + 2 for code in range(0, 36)]
+pairDoubles = [code // 6 == code % 6 for code in range(0, 36)]
+
+class DiceBuffer:
+    """Class to hand out throws of two dice from large blocks generated at once"""
+
+    def __init__(self, generator=random, blockSize=2 ** 16):
+        """initialises the buffer; generator is anything with getrandbits (the random module, a random.Random
+        instance) or a NumPy Generator, and blockSize is the number of random bytes generated per block"""
+        self.generator = generator
+        self.blockSize = blockSize
+        self.block = b'' # throw codes, as bytes
+        self.cursor = 0 # index of the next throw code to hand out
+
+    def refill(self):
+        """to generate a new block of throw codes"""
+        if hasattr(self.generator, 'getrandbits'):
+            data = self.generator.getrandbits(8 * self.blockSize).to_bytes(self.blockSize, 'little')
+        else:
+            data = self.generator.bytes(self.blockSize)
+        self.block = data.translate(pairCodes, rejectedBytes)
+        self.cursor = 0
+
+    def draw(self):
+        """to hand out the code of the next throw"""
+        if self.cursor == len(self.block):
+            self.refill()
+        self.cursor += 1
+        return(self.block[self.cursor - 1])
+
+class Deck:
+    """Class to store a pile of sixteen community chest or chance cards"""
+
+    def __init__(self, cards, size=16, reshuffle=False, generator=random):
+        """initialises the pile with cards plus enough non-movement cards (None) to make size cards, shuffled
+        with generator (anything with a shuffle method: the random module, a random.Random instance or a NumPy
+        Generator)"""
+        self.cards = list(cards) + [None] * (size - len(cards))
+        self.generator = generator
+        generator.shuffle(self.cards)
+        self.cursor = 0 # index of the card at the top of the pile
+        self.reshuffle = reshuffle # whether to reshuffle the pile once every card has been drawn
+
+    def draw(self):
+        """to draw the card at the top of the pile; the card goes back to the bottom of the pile"""
+        card = self.cards[self.cursor]
+        self.cursor += 1
+        if self.cursor == len(self.cards): # whole pile drawn
+            self.cursor = 0
+            if self.reshuffle:
+                self.generator.shuffle(self.cards)
+        return(card)
+
+    def state(self):
+        """to return the state of the pile, as saved in checkpoints"""
+        return({'cards': self.cards, 'cursor': self.cursor, 'reshuffle': self.reshuffle})
+
+
 def cChest(cChestCards):
-    # function that computes output of community chest
-    odds = randint(1, 16)
-    if odds <= 2: # if number from random generator is 1 or 2; effectively simulates chance
-        # community chest having a move card 2/16
-        to_return = cChestCards[0] # selects card at the top of the pile
-        cChestCards.remove(to_return) # to shift to_return from the top of the pile to the bottom of the pile
-        cChestCards.append(to_return)
-        return(to_return)
-    else:
-        return(None)
+    # function that computes output of community chest; returns None for a card that doesn't move the player
+    return(cChestCards.draw())
 
 def chance(chanceCards):
-    # function that computes output of community chest
-    odds = randint(1, 16)
-    if odds <= 10: # if number from random generator is between 1 and 10; effectively simulates chance
-        # chance having a move card has probability 10/16
-        to_return = chanceCards[0] # selects card at the top of the pile
-        chanceCards.remove(to_return) # to shift to_return from the top of the pile to the bottom of the pile
-        chanceCards.append(to_return)
-        return(to_return)
-    else:
-        return(None)
+    # function that computes output of chance; returns None for a card that doesn't move the player
+    return(chanceCards.draw())
 
+def cardTarget(card, currentPos):
+    """function to compute the square a community chest or chance card moves the player to (None if it doesn't move)"""
+    if card == -3: # go back three spaces
+        return(currentPos - 3)
+    elif card == "R": # next railway station
+        return(nextRailway[currentPos])
+    elif card == "U": # next utility
+        return(nextUtility[currentPos])
+    else: # condition for possibilities 'GO', 'JAIL', 'C1', 'E3', 'H2', 'R1'
+        return(squareIndex[card])
 
-def main(nRolls):
-    positions = {0: "GO", 1: "A1", 2: "CC1", 3: "A2", 4: "T1", 5: "R1", 6: "B1", 7: "CH1", 8: "B2", 9: "B3", 10: "JAIL",
-                 11: "C1", 12: "U1", 13: "C2", 14: "C3", 15: "R2", 16: "D1", 17: "CC2", 18: "D2", 19: "D3", 20: "FP",
-                 21: "E1", 22: "CH2", 23: "E2", 24: "E3", 25: "R3", 26: "F1", 27: "F2", 28: "U2", 29: "F3", 30: "G2J",
-                 31: "G1", 32: "G2", 33: "CC3", 34: "G3", 35: "R4", 36: "CH3", 37: "H1", 38: "T2", 39: "H2"}
 
-    landCount = {x : 0 for x in range(0, 40)}
+class Simulation:
+    """Class to store the state of a single token's simulation, so that it can be run in several stretches"""
 
-    cChestCards = ['GO', 'JAIL'] # two out of sixteen cards
-    chanceCards = ['GO', 'JAIL', 'C1', 'E3', 'H2', 'R1', 'R', 'R', 'U', -3] # ten out of sixteen cards
-        # R = next railway station
-        # U = next utility
-        # -3 = go back three spaces
+    def __init__(self, reshuffle=False, dice=None):
+        """initialises the token on GO with fresh piles; reshuffle determines whether the community chest and
+        chance piles are reshuffled each time they run out, and dice is the DiceBuffer throws are drawn from
+        (by default, one drawing on the random module); the piles are shuffled with the dice's generator too, so
+        that seeding it makes the whole simulation reproducible"""
+        self.landCount = array('q', [0]) * 40 # landings on each square, as a contiguous array of 64-bit counts
+        self.dice = dice if dice != None else DiceBuffer()
+        self.cChestCards = Deck(cChestDeck, reshuffle=reshuffle, generator=self.dice.generator)
+        self.chanceCards = Deck(chanceDeck, reshuffle=reshuffle, generator=self.dice.generator)
+        self.currentPos = 0
+        self.rolls = 0 # turns simulated so far
 
-    currentPos = 0
+    def run(self, nRolls):
+        """to simulate a further nRolls turns, adding the landings to self.landCount"""
+        landCount, cChestCards, chanceCards = self.landCount, self.cChestCards, self.chanceCards
+        currentPos = self.currentPos
+        dice = self.dice
+        block, cursor = dice.block, dice.cursor # reading throws straight from the buffer
 
-    for turn in range(0, nRolls):
-        moves = roll() # stores the moves the player has to make
+        for turn in range(0, nRolls):
+            for throw in range(0, 3):
+                if cursor == len(block):
+                    dice.refill()
+                    block, cursor = dice.block, 0
+                code = block[cursor]
+                cursor += 1
 
-        for move in moves:
-            if move == "G2J":  # when three doubles are rolled
-                currentPos = 10
-                landCount[10] += 1
-            else:
+                if throw == 2 and pairDoubles[code]:  # when three doubles are rolled
+                    currentPos = 10
+                    landCount[10] += 1
+                    break
 
-                currentPos += move # move forward "move" spaces
+                currentPos += pairSums[code] # move forward by the sum of the dice
                 currentPos = currentPos % 40 # necessary condition, else currentPos exceeds 39
                 landCount[currentPos] += 1 # add one to landCount
 
-                if positions[currentPos] == "G2J":  # if landed on "Go to Jail"
+                squareType = squareTypes[currentPos]
+
+                if squareType == GO_TO_JAIL:  # if landed on "Go to Jail"
                     currentPos = 10
                     landCount[10] += 1
 
-                elif "CC" in positions[currentPos]: # if first two letters of currentPos key are CC, then land on community chest
+                elif squareType == COMMUNITY_CHEST:
                     next = cChest(cChestCards)
                     if next != None:
-                        if next == "GO":
-                            currentPos = 0
-                            landCount[0] += 1
-                        elif next == "JAIL":
-                            currentPos = 10
-                            landCount[10] += 1
-
-                elif "CH" in positions[currentPos]:
+                        target = cardTarget(next, currentPos)
+                        if target != None:
+                            currentPos = target
+                            landCount[currentPos] += 1
+
+                elif squareType == CHANCE:
                     next = chance(chanceCards)
                     if next != None:
-                        if next == -3: # if chance function returns - 3, go back three spaces
-                            currentPos -= 3
+                        target = cardTarget(next, currentPos)
+                        if target != None:
+                            currentPos = target
                             landCount[currentPos] += 1
-                        elif next == "R": # if chance function returns 'R', go to next railway station
-                            for i in range(currentPos, 40):
-                                if i == 6 or i == 16 or i == 26 or i == 36: # condition for i = index of next railway station
-                                    currentPos = i
-                                    landCount[currentPos] += 1
-                                    break
-                        elif next == "U":  # if chance function returns 'U', go to next utility
-                            for i in range(currentPos, 40): # condition for i = index of next utility
-                                if i == 12 or i == 28:
-                                    currentPos = i
-                                    landCount[currentPos] += 1
-                                    break
-                        else: # condition for possibilities 'GO', 'JAIL', 'C1', 'E3', 'H2', 'R1'
-                            for position, value in positions.items():
-                                if value == next: # if value in given dictionary corresponding a
-                                        # certain key equals next, then said key is the position when moved
-                                    currentPos = position
-                                    landCount[currentPos] += 1
-
-    landPercentages = {}
-    for position, count in landCount.items():
-        landPercentages[position] = count * 100 / nRolls
-
-    for key, value in landPercentages.items():
+
+                if not pairDoubles[code]: # only doubles roll again
+                    break
+
+        dice.cursor = cursor
+        self.currentPos = currentPos
+        self.rolls += nRolls
+        return(landCount)
+
+    def save(self, filepath):
+        """to checkpoint the simulation, including the state of the random generator, to filepath
+        the dice must draw on the random module or a random.Random instance, whose state can be saved
+        the file is replaced atomically so that a run killed mid-save leaves the previous checkpoint intact"""
+        checkpoint = {'landCount': self.landCount.tolist(), 'currentPos': self.currentPos, 'rolls': self.rolls,
+                      'cChestCards': self.cChestCards.state(), 'chanceCards': self.chanceCards.state(),
+                      'dice': self.dice.block[self.dice.cursor:].hex(), # throws generated but not yet used
+                      'random': self.dice.generator.getstate()}
+
+        with open(filepath + '.tmp', 'w') as file:
+            json.dump(checkpoint, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(filepath + '.tmp', filepath)
+
+    @classmethod
+    def load(cls, filepath, generator=random):
+        """to resume a simulation checkpointed to filepath, restoring the state of the random generator
+        generator is the random module or random.Random instance the simulation is to continue drawing on"""
+        with open(filepath) as file:
+            checkpoint = json.load(file)
+
+        simulation = cls(dice=DiceBuffer(generator))
+        simulation.dice.block = bytes.fromhex(checkpoint['dice'])
+        simulation.landCount = array('q', checkpoint['landCount'])
+        simulation.currentPos = checkpoint['currentPos']
+        simulation.rolls = checkpoint['rolls']
+        vars(simulation.cChestCards).update(checkpoint['cChestCards'])
+        vars(simulation.chanceCards).update(checkpoint['chanceCards'])
+
+        version, state, gauss = checkpoint['random']
+        generator.setstate((version, tuple(state), gauss))
+        return(simulation)
+
+
+def simulate(nRolls, reshuffle=False, dice=None):
+    """function to simulate nRolls turns of a single token and count its landings on each square"""
+    return(Simulation(reshuffle, dice).run(nRolls))
+
+
+def main(nRolls):
+    printPercentages(percentages(simulate(nRolls), nRolls))
+
+
+def percentages(landCount, nRolls):
+    """function to convert landing counts into landing percentages per roll/turn"""
+    return(array('d', [count * 100 / nRolls for count in landCount]))
+
+
+def printPercentages(landPercentages):
+    """function to print the landing percentage of each square alongside its label"""
+    for key, value in enumerate(landPercentages):
         print(key, positions[key], value)
 
-timer.start()
-main(rolls)
-timer.end()
\ No newline at end of file
+
+def mergeCounts(shards):
+    """function to add up the landing counts of several shards (or runs) of a simulation"""
+    landCount = array('q', [0]) * len(shards[0])
+    for counts in shards:
+        for position in range(0, len(counts)):
+            landCount[position] += counts[position]
+    return(landCount)
+
+
+def importNumpy():
+    """function to import NumPy on first use; only the batched simulation engine and asNumpy need it"""
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return(np)
+
+
+def asNumpy(values):
+    """function to view landing counts or percentages as a NumPy array, without copying them"""
+    importNumpy()
+    return(np.frombuffer(values, dtype=np.int64 if values.typecode == 'q' else np.float64))
+
+
+def simulateCheckpointed(nRolls, filepath, interval=10 ** 6, reshuffle=False):
+    """function to simulate nRolls turns, checkpointing to filepath every interval turns
+    if filepath already holds a checkpoint, the simulation resumes from it and continues bit-for-bit as if it had
+    never stopped; the checkpoint is left in place once the run is complete"""
+    if os.path.exists(filepath):
+        simulation = Simulation.load(filepath)
+    else:
+        simulation = Simulation(reshuffle)
+
+    while simulation.rolls < nRolls:
+        simulation.run(min(interval, nRolls - simulation.rolls))
+        simulation.save(filepath)
+
+    return(simulation.landCount)
+
+
+"""Convergence-driven simulation"""
+
+def simulateUntil(halfWidth, confidence=0.95, batchRolls=10 ** 4, minBatches=10, maxRolls=None, reshuffle=False):
+    """function to keep simulating in batches of batchRolls turns until the confidence interval of every square's
+    landing percentage has a half-width of at most halfWidth (in percentage points), or maxRolls turns are used
+    the standard errors are batch-means standard errors, kept up to date with Welford's running mean and variance
+    returns the landing percentages, the number of rolls used and the achieved half-width of each square"""
+    if maxRolls != None and maxRolls < batchRolls:
+        raise ValueError("maxRolls must cover at least one batch of batchRolls")
+    from statistics import NormalDist
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    simulation = Simulation(reshuffle)
+    previous = array('q', simulation.landCount)
+    nBatches = 0
+    mean = array('d', [0]) * 40 # running mean of the batch percentages
+    sumSquares = array('d', [0]) * 40 # running sum of squared deviations from the mean
+    halfWidths = array('d', [float('inf')]) * 40
+
+    while maxRolls is None or simulation.rolls + batchRolls <= maxRolls:
+        landCount = simulation.run(batchRolls)
+        nBatches += 1
+
+        for position in range(0, 40):
+            count = landCount[position]
+            batchPercentage = (count - previous[position]) * 100 / batchRolls
+            previous[position] = count
+
+            delta = batchPercentage - mean[position]
+            mean[position] += delta / nBatches
+            sumSquares[position] += delta * (batchPercentage - mean[position])
+
+        if nBatches >= 2:
+            for position in range(0, 40):
+                halfWidths[position] = z * (sumSquares[position] / (nBatches - 1) / nBatches) ** 0.5
+
+        if nBatches >= minBatches and max(halfWidths) <= halfWidth:
+            break
+
+    return(percentages(simulation.landCount, simulation.rolls), simulation.rolls, halfWidths)
+
+
+"""Batched simulation engine"""
+
+def simulateBatch(nRolls, nTokens=10 ** 4, seed=None, warmup=20, reshuffle=False, jailPolicy='visit'):
+    """function to simulate nRolls turns split across nTokens independent tokens, advancing all tokens at once
+    with NumPy array operations; each token has its own shuffled community chest and chance piles
+    every token first plays warmup uncounted turns so that tokens starting together on GO don't bias the counts
+    jailPolicy is one of jailPolicies (see defaultRules)
+    returns the landCount histogram, as main(nRolls) would compute it"""
+    importNumpy()
+    if jailPolicy not in jailPolicies:
+        raise ValueError(f"Unknown jail policy: {jailPolicy}")
+    endsTurn, stay = jailPolicy != 'visit', jailPolicy == 'stay'
+
+    rng = np.random.default_rng(seed)
+
+    # square type codes and, for each of the sixteen cards in each pile, the square it moves the player to from
+    # each square (-1 if it doesn't move the player)
+    types = np.array(squareTypes, dtype=np.int8)
+    cChestTargets, chanceTargets = np.full((16, 40), -1), np.full((16, 40), -1)
+    for deck, targets in ((cChestDeck, cChestTargets), (chanceDeck, chanceTargets)):
+        for card, cardName in enumerate(deck):
+            for square in range(0, 40):
+                target = cardTarget(cardName, square)
+                if target != None:
+                    targets[card, square] = target
+
+    currentPos = np.zeros(nTokens, dtype=np.int64)
+    jailTurns = np.full(nTokens, -1, dtype=np.int8) # failed attempts to roll out of jail; -1 when not in jail
+    # each token's piles, as shuffled card numbers, and the index of the card at the top of each pile
+    cChestPiles = rng.permuted(np.tile(np.arange(16, dtype=np.int8), (nTokens, 1)), axis=1)
+    chancePiles = rng.permuted(np.tile(np.arange(16, dtype=np.int8), (nTokens, 1)), axis=1)
+    cChestCursor = np.zeros(nTokens, dtype=np.int64)
+    chanceCursor = np.zeros(nTokens, dtype=np.int64)
+
+    def drawCards(pos, piles, cursor, targets, mask, counts):
+        """draws a card for each token in mask, moving and counting the tokens that draw a movement card"""
+        tokens = np.flatnonzero(mask)
+        target = targets[piles[tokens, cursor[tokens]], pos[tokens]]
+        cursor[tokens] = (cursor[tokens] + 1) % 16 # top card goes to the bottom of the pile
+        if reshuffle: # reshuffling the piles that have been drawn through
+            exhausted = tokens[cursor[tokens] == 0]
+            piles[exhausted] = rng.permuted(piles[exhausted], axis=1)
+        tokens, target = tokens[target >= 0], target[target >= 0]
+        pos[tokens] = target
+        counts += np.bincount(target, minlength=40)
+
+    def takeTurn(n, counts):
+        """plays one turn for each of the first n tokens, adding their landings to counts"""
+        pos, jailed = currentPos[:n], jailTurns[:n]
+        rolling = np.ones(n, dtype=bool) # tokens that still have to roll this turn
+        leaving = np.zeros(n, dtype=bool) # tokens leaving jail, which move by their first roll and stop there
+
+        for throw in range(3):
+            d1, d2 = rng.integers(1, 7, size=(2, n), dtype=np.int8)
+            doubles = d1 == d2
+
+            if stay and throw == 0: # tokens in jail roll for doubles, and leave anyway on their third attempt
+                inJail = jailed >= 0
+                leaving = inJail & (doubles | (jailed == 2))
+                staying = inJail & ~leaving
+                jailed[staying] += 1
+                jailed[leaving] = -1
+                rolling &= ~staying
+
+            if throw == 2: # three doubles; go to jail
+                g2j = rolling & doubles
+                pos[g2j] = 10
+                counts[10] += np.count_nonzero(g2j)
+                if stay:
+                    jailed[g2j] = 0
+                rolling &= ~doubles
+
+            pos[rolling] = (pos[rolling] + d1[rolling] + d2[rolling]) % 40
+            counts += np.bincount(pos[rolling], minlength=40)
+
+            landed = np.where(rolling, types[pos], NORMAL)
+            g2j = landed == GO_TO_JAIL
+            pos[g2j] = 10
+            counts[10] += np.count_nonzero(g2j)
+            drawCards(pos, cChestPiles, cChestCursor, cChestTargets, landed == COMMUNITY_CHEST, counts)
+            drawCards(pos, chancePiles, chanceCursor, chanceTargets, landed == CHANCE, counts)
+
+            if endsTurn: # tokens sent to jail (only ever by a card or "Go to Jail" here) end their turn
+                sent = (landed != NORMAL) & (pos == 10)
+                if stay:
+                    jailed[sent] = 0
+                rolling &= ~sent
+
+            rolling &= doubles & ~leaving # only doubles roll again, except when leaving jail
+            if not rolling.any():
+                break
+
+    nTokens = min(nTokens, nRolls)
+    for turn in range(warmup):
+        takeTurn(nTokens, np.zeros(40, dtype=np.int64))
+
+    landCount = np.zeros(40, dtype=np.int64)
+    remaining = nRolls
+    while remaining > 0:
+        n = min(nTokens, remaining) # tokens taking a turn in this step
+        takeTurn(n, landCount)
+        remaining -= n
+
+    return(array('q', landCount.tobytes()))
+
+
+"""Parallel simulation"""
+
+def simulateShard(shard):
+    """function to simulate one shard of a parallel run in a worker process
+    shard is a (seed, nRolls) tuple; the worker's global random generator is reseeded so that the simulation
+    is reproducible regardless of which process in the pool picks the shard up"""
+    seed, nRolls = shard
+    random.seed(seed)
+    return(simulate(nRolls))
+
+
+def simulateParallel(nRolls, seed, nWorkers=None):
+    """function to split nRolls turns across a pool of nWorkers processes and merge their landing counts
+    each shard gets its own random stream derived from seed and the shard number, so results are bit-identical
+    for a given seed and number of workers; without a seed, a fresh one is drawn for every run"""
+    if nWorkers is None:
+        nWorkers = os.cpu_count()
+    if seed is None:
+        seed = int.from_bytes(os.urandom(8), 'big')
+
+    # splitting the roll budget as evenly as possible
+    shards = []
+    for i in range(nWorkers):
+        shardRolls = nRolls // nWorkers + (1 if i < nRolls % nWorkers else 0)
+        shards.append((f"{seed}:{i}", shardRolls)) # string seeds are hashed into independent streams
+
+    from multiprocessing import Pool
+    with Pool(nWorkers) as pool:
+        shardCounts = pool.map(simulateShard, shards)
+
+    return(mergeCounts(shardCounts))
+
+
+"""Rules variants"""
+
+# description of the rules the simulator follows; variants are given as dictionaries overriding some of these
+defaultRules = {'board': [positions[square] for square in range(0, 40)], # square labels, in order from GO
+                'nDice': 2, 'diceSides': 6,
+                'doublesToJail': 3, # number of consecutive doubles that sends the player to jail
+                'cChestCards': list(cChestDeck), 'chanceCards': list(chanceDeck), # movement cards in each pile
+                'pileSize': 16, # number of cards in each pile, including those that don't move the player
+                'railwayStations': list(railwayStations), 'utilities': list(utilities),
+                'jailPolicy': 'visit'} # 'visit': the player leaves jail on their next roll
+                    # 'pay': being sent to jail ends the turn, and the player pays to leave at the start of the next
+                    # 'stay': being sent to jail ends the turn, and the player stays in jail until they roll doubles
+                    # or for up to three turns, paying to leave with the third roll
+
+jailPolicies = ('visit', 'pay', 'stay')
+
+def fullRules(rules=None):
+    """function to complete a (partial) rules description with the default rules"""
+    rules = dict(defaultRules, **(rules or {}))
+    for name in rules:
+        if name not in defaultRules:
+            raise KeyError(f"Unknown rule: {name}")
+    if rules['jailPolicy'] not in jailPolicies:
+        raise ValueError(f"Unknown jail policy: {rules['jailPolicy']}")
+    return(rules)
+
+
+def rulesKey(rules):
+    """function to hash a rules description into the key its results are cached under"""
+    return(hashlib.sha256(json.dumps(fullRules(rules), sort_keys=True).encode()).hexdigest())
+
+
+class Board:
+    """Class to store a rules variant compiled into the tables the exact solver works with"""
+
+    def __init__(self, rules=None):
+        """initialises the board from a (partial) rules description"""
+        self.rules = fullRules(rules)
+        self.size = len(self.rules['board'])
+        self.positions = dict(enumerate(self.rules['board']))
+        self.squareTypes, self.nextRailway, self.nextUtility, self.squareIndex = \
+            compileBoard(self.positions, self.rules['railwayStations'], self.rules['utilities'])
+        self.jail = self.squareIndex['JAIL']
+        self.cChestDeck, self.chanceDeck = tuple(self.rules['cChestCards']), tuple(self.rules['chanceCards'])
+        self.pileSize = self.rules['pileSize']
+
+        # (sum, doubles, probability) of each distinct throw of the dice
+        nDice, diceSides = self.rules['nDice'], self.rules['diceSides']
+        throws = {}
+        for dice in itertools.product(range(1, diceSides + 1), repeat=nDice):
+            throw = (sum(dice), nDice >= 2 and len(set(dice)) == 1)
+            throws[throw] = throws.get(throw, 0) + 1 / diceSides ** nDice
+        self.throws = [(total, doubles, p) for (total, doubles), p in throws.items()]
+
+        # number of consecutive doubles a player can have pending; without doubles there is only one layer
+        self.doublesLayers = self.rules['doublesToJail'] if nDice >= 2 else 1
+        # number of turns a player can spend in jail rolling for doubles, each a state of its own
+        self.jailStates = 3 if self.rules['jailPolicy'] == 'stay' else 0
+        self.turns = None # per-turn operator, built on first use
+
+    def cardTarget(self, card, currentPos):
+        """to compute the square a community chest or chance card moves the player to (None if it doesn't move)"""
+        if isinstance(card, int): # move back or forward a number of spaces
+            return((currentPos + card) % self.size)
+        elif card == "R": # next railway station
+            return(self.nextRailway[currentPos])
+        elif card == "U": # next utility
+            return(self.nextUtility[currentPos])
+        else:
+            return(self.squareIndex[card])
+
+    def landingOutcomes(self, square):
+        """to list the (probability, squares counted, final square) outcomes of landing on square"""
+        if self.squareTypes[square] == GO_TO_JAIL: # landing on "Go to Jail" counts both the square and jail
+            return([(1.0, (square, self.jail), self.jail)])
+
+        if self.squareTypes[square] == COMMUNITY_CHEST:
+            cards = self.cChestDeck
+        elif self.squareTypes[square] == CHANCE:
+            cards = self.chanceDeck
+        else:
+            return([(1.0, (square,), square)])
+
+        # each card in the pile is equally likely; cards not in the deck don't move the player
+        outcomes = [((self.pileSize - len(cards)) / self.pileSize, (square,), square)]
+        for card in cards:
+            target = self.cardTarget(card, square)
+            if target != None:
+                outcomes.append((1 / self.pileSize, (square, target), target))
+            else:
+                outcomes.append((1 / self.pileSize, (square,), square))
+        return(outcomes)
+
+    def transitionMatrix(self, layers=None):
+        """to build the per-roll transition matrix over (square, consecutive doubles) states, followed by the
+        jail states of the 'stay' policy (a player in jail having failed 0, 1 or 2 times to roll doubles)
+        state index is doubles * board size + square, or layers * board size + failed attempts in jail; returns
+        the sparse rows of the transition matrix (a dictionary of next state to probability per state) and the
+        expected landings on each square per roll from each state
+        layers is the number of consecutive doubles layers in the state space (by default, as many as the rules
+        need); extra layers are never entered, and behave like the last one, so that boards with different doubles
+        rules can share a state space"""
+        size, jail = self.size, self.jail
+        layers = max(layers or 0, self.doublesLayers)
+        nStates = layers * size + self.jailStates
+        transitions = [{} for state in range(nStates)]
+        landings = [{} for state in range(nStates)]
+
+        # state a player sent to jail moves to; under the 'visit' policy they carry on from the jail square
+        jailed = {'visit': None, 'pay': jail, 'stay': layers * size}[self.rules['jailPolicy']]
+
+        def move(row, landed, square, p, nextDoubles):
+            """adds the outcomes of moving to square with probability p to a row and its landings"""
+            for q, counted, final in outcomes[square]:
+                if jailed != None and final == jail and counted[0] != jail: # sent to jail; the turn is over
+                    nextState = jailed
+                else:
+                    nextState = nextDoubles * size + final
+                row[nextState] = row.get(nextState, 0) + p * q
+                for position in counted:
+                    landed[position] = landed.get(position, 0) + p * q
+
+        outcomes = [self.landingOutcomes(square) for square in range(0, size)] # computed once per square
+
+        for state in range(layers * size):
+            doubles, square = divmod(state, size)
+            row, landed = transitions[state], landings[state]
+
+            for total, isDouble, p in self.throws:
+                if isDouble and doubles >= self.doublesLayers - 1: # one double too many; go straight to jail
+                    nextState = jailed if jailed != None else jail
+                    row[nextState] = row.get(nextState, 0) + p
+                    landed[jail] = landed.get(jail, 0) + p
+                    continue
+
+                nextDoubles = doubles + 1 if isDouble else 0 # a non-double ends the turn
+                move(row, landed, (square + total) % size, p, nextDoubles)
+
+        for attempts in range(self.jailStates):
+            state = layers * size + attempts
+            row, landed = transitions[state], landings[state]
+
+            for total, isDouble, p in self.throws:
+                if not isDouble and attempts < self.jailStates - 1: # staying in jail for another turn
+                    row[state + 1] = row.get(state + 1, 0) + p
+                else: # leaving jail, moving by this roll without rolling again
+                    move(row, landed, (jail + total) % size, p, 0)
+
+        return(transitions, landings)
+
+    def turnOperator(self):
+        """to build (or look up) the per-turn operator: for each state a turn starts in (a square, or a turn in
+        jail), the probability of ending the turn in each such state and the expected landings on each square
+        during the turn"""
+        if self.turns == None:
+            transitions, landings = self.transitionMatrix()
+            starts = set(self.turnStarts())
+            ends, landed = {}, {}
+            for start in self.turnStarts():
+                vector, end, counts = {start : 1.0}, {}, {}
+                while vector: # rolls of the turn
+                    rolling = {}
+                    for state, p in vector.items():
+                        for position, count in landings[state].items():
+                            counts[position] = counts.get(position, 0) + p * count
+                        for nextState, q in transitions[state].items():
+                            if nextState in starts: # turn over
+                                end[nextState] = end.get(nextState, 0) + p * q
+                            else:
+                                rolling[nextState] = rolling.get(nextState, 0) + p * q
+                    vector = rolling
+                ends[start], landed[start] = end, counts
+            self.turns = (ends, landed)
+        return(self.turns)
+
+    def turnStarts(self, layers=None):
+        """to list the states of the roll chain in which a roll starts a new turn"""
+        layers = max(layers or 0, self.doublesLayers)
+        return(list(range(0, self.size)) + list(range(layers * self.size, layers * self.size + self.jailStates)))
+
+    def stateSquares(self, layers=None):
+        """to list the square the token is on in each state of the roll chain"""
+        layers = max(layers or 0, self.doublesLayers)
+        return([state % self.size for state in range(0, layers * self.size)] + [self.jail] * self.jailStates)
+
+    def solve(self):
+        """to compute the landing percentages exactly from the stationary distribution of the roll chain
+        percentages are per turn, matching main(nRolls) in the limit of many rolls"""
+        transitions, landings = self.transitionMatrix()
+        return(landingPercentages(stationaryDistribution(transitions), landings, self.size, self.turnStarts()))
+
+
+def expectedLandings(pi, landings, size):
+    """function to compute the expected landings on each square per roll, given the probability of each state"""
+    landCount = array('d', [0]) * size
+    for state, landed in enumerate(landings):
+        for position, count in landed.items():
+            landCount[position] += pi[state] * count
+    return(landCount)
+
+
+def landingPercentages(pi, landings, size, turnStarts=None):
+    """function to convert the stationary distribution of the roll chain into landing percentages per turn
+    turnStarts are the states in which a roll starts a new turn (by default, the states without pending doubles)"""
+    if turnStarts == None:
+        turnStarts = range(0, size)
+    turns = sum(pi[state] for state in turnStarts) # fraction of rolls that start a new turn
+    return(percentages(expectedLandings(pi, landings, size), turns))
+
+
+def simulateRules(rules, nRolls, reshuffle=True):
+    """function to simulate nRolls turns of a single token under a rules variant and count its landings
+    slower than Simulation, which is specialised to the default rules, but covers every rule; piles are reshuffled
+    when they run out by default, which is what the exact solver assumes"""
+    board = Board(rules)
+    size, jail, squareTypes = board.size, board.jail, board.squareTypes
+    nDice, diceSides, doublesToJail = board.rules['nDice'], board.rules['diceSides'], board.rules['doublesToJail']
+    stay = board.rules['jailPolicy'] == 'stay'
+    endsTurn = board.rules['jailPolicy'] != 'visit' # whether being sent to jail ends the turn
+
+    landCount = array('q', [0]) * size
+    cChestCards = Deck(board.cChestDeck, board.pileSize, reshuffle)
+    chanceCards = Deck(board.chanceDeck, board.pileSize, reshuffle)
+    currentPos = 0
+    jailTurns = None # turns spent trying to roll out of jail; None when the player is not in jail
+
+    for turn in range(0, nRolls):
+        doubles = 0
+        while True:
+            dice = [randint(1, diceSides) for die in range(0, nDice)]
+            isDouble = nDice >= 2 and dice.count(dice[0]) == nDice
+
+            if jailTurns != None: # trying to roll doubles to get out of jail
+                if not isDouble and jailTurns < 2:
+                    jailTurns += 1
+                    break
+                jailTurns, isDouble = None, False # leaving jail, moving by this roll without rolling again
+
+            elif isDouble:
+                doubles += 1
+                if doubles == doublesToJail: # too many doubles; go to jail
+                    currentPos = jail
+                    landCount[jail] += 1
+                    if stay:
+                        jailTurns = 0
+                    break
+
+            currentPos = (currentPos + sum(dice)) % size
+            landCount[currentPos] += 1
+
+            squareType, card = squareTypes[currentPos], None
+            if squareType == GO_TO_JAIL:
+                card = 'JAIL'
+            elif squareType == COMMUNITY_CHEST:
+                card = cChest(cChestCards)
+            elif squareType == CHANCE:
+                card = chance(chanceCards)
+
+            if card != None:
+                target = board.cardTarget(card, currentPos)
+                if target != None:
+                    currentPos = target
+                    landCount[currentPos] += 1
+                if card == 'JAIL' and endsTurn: # sent to jail; the turn is over
+                    if stay:
+                        jailTurns = 0
+                    break
+
+            if not isDouble: # only doubles roll again
+                break
+
+    return(landCount)
+
+
+cacheDir = 'landing_cache' # directory the results of rules variants are cached in
+distributions = {} # results already loaded or computed, by rules key
+
+def distribution(rules=None, cacheDir=cacheDir):
+    """function to compute the landing percentages of a rules variant with the exact solver
+    results are keyed by a hash of the complete rules description and cached in memory and in cacheDir, so that
+    repeated queries for a known variant return without solving again"""
+    rules = fullRules(rules)
+    key = rulesKey(rules)
+    if key in distributions:
+        return(distributions[key])
+
+    filepath = os.path.join(cacheDir, key + '.json')
+    if os.path.exists(filepath):
+        with open(filepath) as file:
+            landPercentages = array('d', json.load(file)['landPercentages'])
+    else:
+        landPercentages = Board(rules).solve()
+        os.makedirs(cacheDir, exist_ok=True)
+        with open(filepath + '.tmp', 'w') as file:
+            json.dump({'rules': rules, 'landPercentages': landPercentages.tolist()}, file)
+        os.replace(filepath + '.tmp', filepath)
+
+    distributions[key] = landPercentages
+    return(landPercentages)
+
+
+"""Parameter sweeps"""
+
+def sweep(grid, filepath='sweep_results.csv', nWorkers=None):
+    """function to solve a grid of rules variants exactly across a pool of processes and save a single result table
+    grid is either a dictionary of rule names to lists of values, whose every combination is evaluated, or a list
+    of (partial) rules descriptions; variants that describe the same rules are only evaluated once
+    each row of the table (a CSV file) holds a variant's overridden rules and the landing percentage of each
+    square; returns the rows"""
+    if isinstance(grid, dict):
+        names = list(grid)
+        variants = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    else:
+        variants = list(grid)
+
+    # removing duplicate variants
+    unique = {}
+    for variant in variants:
+        unique.setdefault(rulesKey(variant), fullRules(variant))
+
+    from multiprocessing import Pool
+    with Pool(nWorkers) as pool:
+        results = pool.map(distribution, unique.values())
+
+    size = max(len(rules['board']) for rules in unique.values())
+    header = ['key', 'rules'] + [str(square) for square in range(0, size)]
+    rows = []
+    for (key, rules), landPercentages in zip(unique.items(), results):
+        overrides = {name : value for name, value in rules.items() if value != defaultRules[name]}
+        rows.append([key, json.dumps(overrides, sort_keys=True)] +
+                    [landPercentages[square] if square < len(landPercentages) else '' for square in range(0, size)])
+
+    with open(filepath, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+    return(rows)
+
+
+"""Variance-reduced estimators"""
+
+def playTurn(board, token, throws, draw, plainCount, expectedCount):
+    """function to play one turn of a token under board's rules with pre-drawn dice
+    token is a [currentPos, jailTurns] list, updated in place; throws holds the dice of each roll the turn may
+    need, and draw(roll, squareType) draws a card for a roll landing on a community chest or chance square,
+    returning the card and the cards it was equally likely to be; plainCount counts the landings as they happen,
+    while expectedCount counts card outcomes by their conditional expectation over those cards rather than by the
+    card drawn"""
+    size, jail = board.size, board.jail
+    stay = board.rules['jailPolicy'] == 'stay'
+    endsTurn = board.rules['jailPolicy'] != 'visit' # whether being sent to jail ends the turn
+    currentPos, jailTurns = token
+    doubles = 0
+
+    for roll, dice in enumerate(throws):
+        isDouble = len(dice) >= 2 and dice.count(dice[0]) == len(dice)
+
+        if jailTurns != None: # trying to roll doubles to get out of jail
+            if not isDouble and jailTurns < 2:
+                jailTurns += 1
+                break
+            jailTurns, isDouble = None, False
+
+        elif isDouble:
+            doubles += 1
+            if doubles == board.rules['doublesToJail']: # too many doubles; go to jail
+                currentPos = jail
+                plainCount[jail] += 1
+                expectedCount[jail] += 1
+                if stay:
+                    jailTurns = 0
+                break
+
+        currentPos = (currentPos + sum(dice)) % size
+        plainCount[currentPos] += 1
+        expectedCount[currentPos] += 1
+
+        squareType, drawn = board.squareTypes[currentPos], None
+        if squareType == GO_TO_JAIL:
+            drawn = 'JAIL'
+            expectedCount[jail] += 1
+        elif squareType in (COMMUNITY_CHEST, CHANCE):
+            drawn, cards = draw(roll, squareType)
+            for card in cards: # each of these cards was equally likely
+                target = board.cardTarget(card, currentPos) if card != None else None
+                if target != None:
+                    expectedCount[target] += 1 / len(cards)
+
+        if drawn != None:
+            target = board.cardTarget(drawn, currentPos)
+            if target != None:
+                currentPos = target
+                plainCount[currentPos] += 1
+            if drawn == 'JAIL' and endsTurn: # sent to jail; the turn is over
+                if stay:
+                    jailTurns = 0
+                break
+
+        if not isDouble: # only doubles roll again
+            break
+
+    token[0], token[1] = currentPos, jailTurns
+
+
+def poissonSolution(board):
+    """function to compute the exact per-turn quantities the control variate of estimateRules is built from
+    returns the states a turn starts in, the expected landings on each square per turn in the long run (pi * H,
+    with H the expected landings during a turn from each start state) and the solution g of the Poisson equation
+    g = H - pi * H + K * g of the turn chain K, one vector of squares per start state, so that the landings of a
+    turn plus g at its end, less g at its start, have conditional expectation pi * H whatever the start"""
+    ends, landed = board.turnOperator()
+    starts = board.turnStarts()
+    index = {state : i for i, state in enumerate(starts)}
+    n, size = len(starts), board.size
+
+    turnTransitions = [{index[end] : p for end, p in ends[state].items()} for state in starts]
+    pi = stationaryDistribution(turnTransitions)
+    expected = [sum(pi[i] * landed[state].get(square, 0) for i, state in enumerate(starts))
+                for square in range(0, size)]
+
+    # g = Z * (H - pi * H) for each square, with Z the fundamental matrix (I - K + 1 * pi) inverse
+    matrix = [list(pi) for i in range(n)]
+    for i, row in enumerate(turnTransitions):
+        matrix[i][i] += 1
+        for j, p in row.items():
+            matrix[i][j] -= p
+    factorisation = luFactor(matrix)
+    columns = [luSolve(factorisation, [landed[state].get(square, 0) - expected[square] for state in starts])
+               for square in range(0, size)]
+    g = {state : [columns[square][i] for square in range(0, size)] for i, state in enumerate(starts)}
+    return(starts, expected, g)
+
+
+def estimateRules(rules, nRolls, batchRolls=10 ** 4, seed=None, baseline=None):
+    """function to estimate the landing percentages of a rules variant with variance-reduced simulation
+    card outcomes are counted by their conditional expectation over the cards left in the pile (Rao-
+    Blackwellised), and a control variate is built from a token playing the baseline rules: each turn it restarts
+    from the variant token's state and throws the same dice and, as far as its pile allows, draws the same cards;
+    its landings, corrected by the baseline's exact Poisson solution (see poissonSolution), have a known mean, so
+    they cancel most of the variant's noise wherever the two rules agree; the baseline defaults to the variant
+    with the 'visit' jail policy
+    returns the estimated percentages and a report of the batch-means variance of the plain, conditional
+    expectation and control variate estimators, and the variance reduction achieved, per square"""
+    if nRolls < 2 * batchRolls:
+        raise ValueError("nRolls must cover at least two batches of batchRolls")
+    if nRolls % batchRolls:
+        raise ValueError("nRolls must be a multiple of batchRolls")
+    board = Board(rules)
+    baselineBoard = Board(baseline if baseline != None else dict(board.rules, jailPolicy='visit'))
+    if baselineBoard.size != board.size:
+        raise ValueError("The baseline rules must have the same board size as the variant")
+    starts, expected, g = poissonSolution(baselineBoard)
+
+    rng = random.Random(seed)
+    size, jail = board.size, baselineBoard.jail
+    nDice, diceSides = board.rules['nDice'], board.rules['diceSides']
+    maxRolls = max(board.rules['doublesToJail'], baselineBoard.rules['doublesToJail'])
+    baselineStay = baselineBoard.rules['jailPolicy'] == 'stay'
+    firstJailState = baselineBoard.doublesLayers * size
+
+    # the variant draws from shuffled piles, reshuffled once drawn through, which the seeded rng controls
+    decks = {COMMUNITY_CHEST : Deck(board.cChestDeck, board.pileSize, True, rng),
+             CHANCE : Deck(board.chanceDeck, board.pileSize, True, rng)}
+    piles = {COMMUNITY_CHEST : [None] * (baselineBoard.pileSize - len(baselineBoard.cChestDeck)) +
+                               list(baselineBoard.cChestDeck),
+             CHANCE : [None] * (baselineBoard.pileSize - len(baselineBoard.chanceDeck)) + list(baselineBoard.chanceDeck)}
+    # the baseline can share the variant's cards where its piles hold the same cards
+    shared = {squareType : sorted(map(str, piles[squareType])) == sorted(map(str, decks[squareType].cards))
+              for squareType in piles}
+
+    drawn = {} # (pile, card, cards left, cards already drawn) of each roll of the variant's turn that drew a card
+
+    def drawVariant(roll, squareType):
+        deck = decks[squareType]
+        cards, used = deck.cards[deck.cursor:], deck.cards[:deck.cursor]
+        card = deck.draw()
+        drawn[roll] = (squareType, card, cards, used)
+        return(card, cards)
+
+    def drawBaseline(roll, squareType):
+        # when the variant drew from the same pile on this roll, its card is kept with probability (cards left) /
+        # (pile size) and replaced by one of the cards already drawn otherwise, which makes the baseline's card
+        # uniform over the whole pile, as the exact solver assumes
+        pile = piles[squareType]
+        if shared[squareType] and drawn.get(roll, (None,))[0] == squareType:
+            squareType, card, cards, used = drawn[roll]
+            if rng.random() * len(pile) >= len(cards):
+                card = rng.choice(used)
+        else:
+            card = rng.choice(pile)
+        return(card, pile)
+
+    def baselineState(token):
+        # state of the baseline's turn chain a token is in
+        if baselineStay and token[1] != None:
+            return(firstJailState + token[1])
+        return(token[0])
+
+    token = [0, None]
+    plainBatches, expectedBatches, controlBatches = [], [], [] # batch percentages of each estimator
+    for batch in range(0, nRolls // batchRolls):
+        plainCount = [0] * size
+        expectedCount = [0] * size
+        controlCount, unused = [0] * size, [0] * size
+        startCount, endCount = dict.fromkeys(starts, 0), dict.fromkeys(starts, 0)
+
+        for turn in range(0, batchRolls):
+            # common random numbers for both tokens
+            throws = [[rng.randint(1, diceSides) for die in range(0, nDice)] for roll in range(0, maxRolls)]
+            baselineToken = [token[0], token[1] if baselineStay else None]
+            startCount[baselineState(baselineToken)] += 1
+
+            drawn.clear()
+            playTurn(board, token, throws, drawVariant, plainCount, expectedCount)
+            playTurn(baselineBoard, baselineToken, throws, drawBaseline, unused, controlCount)
+            endCount[baselineState(baselineToken)] += 1
+
+        # the control: the baseline's landings, plus g at the end of each turn less g at its start, less pi * H
+        for state in starts:
+            weight = endCount[state] - startCount[state]
+            if weight:
+                for square in range(0, size):
+                    controlCount[square] += weight * g[state][square]
+        controlCount = [count - batchRolls * expected[square] for square, count in enumerate(controlCount)]
+
+        plainBatches.append([count * 100 / batchRolls for count in plainCount])
+        expectedBatches.append([count * 100 / batchRolls for count in expectedCount])
+        controlBatches.append([count * 100 / batchRolls for count in controlCount])
+
+    nBatches = len(plainBatches)
+
+    def meanVariance(values):
+        """returns the mean of values and the variance of that mean"""
+        mean = sum(values) / len(values)
+        return(mean, sum((v - mean) ** 2 for v in values) / (len(values) - 1) / len(values))
+
+    landPercentages = array('d', [0]) * size
+    report = {'plainVariance': {}, 'expectedVariance': {}, 'controlVariance': {}, 'reduction': {}}
+    for square in range(0, size):
+        plain = [batch[square] for batch in plainBatches]
+        expected = [batch[square] for batch in expectedBatches]
+        control = [batch[square] for batch in controlBatches]
+
+        plainMean, plainVariance = meanVariance(plain)
+        expectedMean, expectedVariance = meanVariance(expected)
+        controlMean = sum(control) / nBatches
+
+        # the control's mean is known to be 0; it is subtracted as is, the coefficient its construction calls for,
+        # since fitting one on a few batches would understate the variance
+        landPercentages[square] = expectedMean - controlMean
+        adjustedVariance = meanVariance([x - y for x, y in zip(expected, control)])[1]
+
+        report['plainVariance'][square] = plainVariance
+        report['expectedVariance'][square] = expectedVariance
+        report['controlVariance'][square] = adjustedVariance
+        report['reduction'][square] = plainVariance / adjustedVariance if adjustedVariance > 0 else float('inf')
+
+    return(landPercentages, report)
+
+
+"""Exact solver"""
+
+defaultBoard = Board()
+
+def landingOutcomes(square):
+    """function to list the (probability, squares counted, final square) outcomes of landing on square"""
+    return(defaultBoard.landingOutcomes(square))
+
+
+def transitionMatrix():
+    """function to build the per-roll transition matrix over (square, consecutive doubles) states of the board
+    state index is doubles * 40 + square; see Board.transitionMatrix"""
+    return(defaultBoard.transitionMatrix())
+
+
+def luFactor(matrix):
+    """function to factorise a square matrix into LU form with partial pivoting, so that systems with the same
+    matrix can be solved repeatedly at the cost of a substitution each; returns the factors and the row order"""
+    n = len(matrix)
+    lu = [list(row) for row in matrix] # L below the diagonal (unit diagonal implied), U on and above it
+    order = list(range(n))
+
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda i: abs(lu[i][col]))
+        lu[col], lu[pivot] = lu[pivot], lu[col]
+        order[col], order[pivot] = order[pivot], order[col]
+        pivotRow = lu[col]
+        pivotTail = pivotRow[col + 1:]
+        for i in range(col + 1, n):
+            row = lu[i]
+            factor = row[col] / pivotRow[col]
+            row[col] = factor
+            if factor != 0:
+                row[col + 1:] = [a - factor * b for a, b in zip(row[col + 1:], pivotTail)]
+
+    return(lu, order)
+
+
+def luSolve(factorisation, vector):
+    """function to solve matrix * x = vector given the LU factorisation of matrix"""
+    lu, order = factorisation
+    n = len(order)
+
+    y = [vector[i] for i in order] # forward substitution with L
+    for i in range(n):
+        row = lu[i]
+        y[i] -= sum(row[j] * y[j] for j in range(i))
+
+    x = [0] * n # back substitution with U
+    for i in range(n - 1, -1, -1):
+        row = lu[i]
+        x[i] = (y[i] - sum(row[j] * x[j] for j in range(i + 1, n))) / row[i]
+    return(x)
+
+
+def solveLinear(matrix, vector):
+    """function to solve matrix * x = vector by Gaussian elimination with partial pivoting"""
+    return(luSolve(luFactor(matrix), vector))
+
+
+def stationaryDistribution(transitions):
+    """function to compute the stationary distribution pi of a chain (pi * P = pi, sum(pi) = 1)"""
+    n = len(transitions)
+
+    # building (P transpose - I), with the last equation replaced by the normalisation condition
+    matrix = [[0] * n for i in range(n)]
+    for state, row in enumerate(transitions):
+        for nextState, p in row.items():
+            matrix[nextState][state] += p
+    for i in range(n):
+        matrix[i][i] -= 1
+    matrix[n - 1] = [1] * n
+    vector = [0] * (n - 1) + [1]
+
+    return(solveLinear(matrix, vector))
+
+
+def solve():
+    """function to compute the landing percentages exactly from the stationary distribution of the roll chain
+    percentages are per turn, matching main(nRolls) in the limit of many rolls"""
+    return(defaultBoard.solve())
+
+
+"""Finite-horizon distributions"""
+
+def turnMatrix(board=None):
+    """function to return the sparse per-turn operator of a board (the default board if None), built from the
+    per-roll transition matrix: for each state a turn starts in (a square, or a turn in jail), the probability of
+    ending the turn in each such state and the expected landings on each square during the turn; computed once per
+    board and cached"""
+    return((board if board != None else defaultBoard).turnOperator())
+
+
+class TurnByTurn:
+    """Class to store the turn-by-turn distributions of a token from a given start, extended on demand"""
+
+    def __init__(self, start=0, board=None):
+        """initialises the horizon at turn 0; start is a square (index or label) or a dictionary of squares to
+        probabilities, and board the rules variant (the default board if None)"""
+        self.board = board if board != None else defaultBoard
+        if isinstance(start, dict):
+            self.start = {self.board.squareIndex.get(square, square) : p for square, p in start.items()}
+        else:
+            self.start = {self.board.squareIndex.get(start, start) : 1.0}
+        self.squares = self.board.stateSquares() # square of each state
+        self.states = [] # probability of each turn start state at the end of turns 1, 2, ...
+        self.distributions = [] # probability of being on each square at the end of turns 1, 2, ...
+        self.cumulative = [] # expected landings on each square over turns 1, 2, ...
+
+    def upTo(self, nTurns):
+        """to return the distributions and cumulative expected landings for turns 1 to nTurns, only computing
+        the turns beyond those already computed"""
+        turnTransitions, turnLandings = turnMatrix(self.board)
+
+        while len(self.distributions) < nTurns:
+            if self.distributions:
+                vector, total = self.states[-1], dict(self.cumulative[-1])
+            else:
+                vector, total = self.start, {x : 0 for x in range(0, self.board.size)}
+
+            nextVector = {}
+            for state, p in vector.items():
+                if p == 0:
+                    continue
+                for position, count in turnLandings[state].items():
+                    total[position] += p * count
+                for nextState, q in turnTransitions[state].items():
+                    nextVector[nextState] = nextVector.get(nextState, 0) + p * q
+
+            distribution = {} # a token in jail, however many turns it has spent there, is on the jail square
+            for state, p in nextVector.items():
+                distribution[self.squares[state]] = distribution.get(self.squares[state], 0) + p
+
+            self.states.append(nextVector)
+            self.distributions.append(distribution)
+            self.cumulative.append(total)
+
+        return(self.distributions[:nTurns], self.cumulative[:nTurns])
+
+
+horizons = {} # TurnByTurn objects for each rules variant and start already queried
+
+def turnDistributions(nTurns, start=0, rules=None):
+    """function to compute the landing distribution after each turn k = 1..nTurns and the cumulative expected
+    landings on each square, for a token starting on start (GO by default), a square or a dictionary of squares
+    to probabilities, under a rules variant
+    results are cached per rules variant and start, so asking for more turns extends the earlier result"""
+    key = (rulesKey(rules), tuple(sorted(start.items(), key=str)) if isinstance(start, dict) else start)
+    if key not in horizons:
+        horizons[key] = TurnByTurn(start, Board(rules) if rules != None else defaultBoard)
+    return(horizons[key].upTo(nTurns))
+
+
+"""First passage and return times"""
+
+# property groups of the board, by the letter their square labels start with
+propertyGroups = {'brown': 'A', 'light blue': 'B', 'pink': 'C', 'orange': 'D', 'red': 'E', 'yellow': 'F',
+                  'green': 'G', 'blue': 'H', 'railroads': 'R', 'utilities': 'U'}
+
+def targetSquares(board, target):
+    """function to convert a target (a property group name, a square label or index, or a list of those) into a
+    set of squares of board"""
+    if isinstance(target, (list, tuple, set, frozenset)):
+        return(set().union(*(targetSquares(board, part) for part in target)))
+    if isinstance(target, int):
+        return({target})
+    if target in propertyGroups:
+        letter = propertyGroups[target]
+        return({square for square, name in board.positions.items() if name[0] == letter and name[1:].isdigit()})
+    return({board.squareIndex[target]})
+
+
+class FirstPassage:
+    """Class to store the factorised roll chain of a board, for first passage and return time queries
+    a target is a property group name, a square label or index, or a list of those; a token hits the target when
+    a roll (including any card or "Go to Jail" move it triggers) ends on one of its squares, and times are counted
+    in turns, the turn of the hit included"""
+
+    def __init__(self, board=None):
+        """initialises the chain, factorising I - P + 1 * pi once for all queries"""
+        self.board = board if board != None else defaultBoard
+        self.transitions, landings = self.board.transitionMatrix()
+        self.pi = stationaryDistribution(self.transitions)
+        n, size = len(self.transitions), self.board.size
+
+        # fundamental matrix Z = (I - P + 1 * pi) inverse, kept as the factorisation and the columns solved so far
+        matrix = [list(self.pi) for i in range(n)]
+        for state, row in enumerate(self.transitions):
+            matrix[state][state] += 1
+            for nextState, p in row.items():
+                matrix[state][nextState] -= p
+        self.factorisation = luFactor(matrix)
+        self.columns = {}
+
+        self.squares = self.board.stateSquares() # square of each state
+        starts = set(self.board.turnStarts())
+        self.turnStarts = [1 if state in starts else 0 for state in range(n)] # rolls from these states start a turn
+        self.zTurnStarts = luSolve(self.factorisation, self.turnStarts)
+
+    def column(self, state):
+        """to return column state of the fundamental matrix, solving for it on first use"""
+        if state not in self.columns:
+            unit = [0] * len(self.transitions)
+            unit[state] = 1
+            self.columns[state] = luSolve(self.factorisation, unit)
+        return(self.columns[state])
+
+    def targetSquares(self, target):
+        """to convert a target into a set of squares"""
+        return(targetSquares(self.board, target))
+
+    def meanTurns(self, target):
+        """to compute the expected number of turns until the target is first hit, from the start of a turn on each
+        square; squares in the target are hit after 0 turns
+        with Z the fundamental matrix, w the turn-start indicator and A the target states, the hitting times are
+        m = Z * w - Z * r + c, where r (zero outside A) and c solve m = 0 on A and pi * r = pi * w"""
+        squares = self.targetSquares(target)
+        n = len(self.transitions)
+        targets = [state for state in range(n) if self.squares[state] in squares]
+        columns = [self.column(state) for state in targets]
+
+        k = len(targets)
+        system = [[-columns[b][a] for b in range(k)] + [1] for a in targets]
+        system.append([self.pi[b] for b in targets] + [0])
+        vector = [-self.zTurnStarts[a] for a in targets] + [sum(p * w for p, w in zip(self.pi, self.turnStarts))]
+        solution = solveLinear(system, vector)
+        r, c = solution[:k], solution[k]
+
+        m = [self.zTurnStarts[state] + c - sum(r[b] * columns[b][state] for b in range(k)) for state in range(n)]
+        for state in targets:
+            m[state] = 0
+        return(m)
+
+    def firstPassage(self, target, start=0):
+        """to compute the expected number of turns until a token starting a turn on square start first hits target"""
+        return(self.meanTurns(target)[start])
+
+    def returnTime(self, target):
+        """to compute the expected number of turns a token starting a turn in target takes to hit it again, with
+        the start square weighted by how often turns start there in the long run"""
+        squares = self.targetSquares(target)
+        m = self.meanTurns(target)
+        weights = {state : self.pi[state] for state in range(len(self.transitions))
+                   if self.turnStarts[state] and self.squares[state] in squares}
+        total = sum(weights.values())
+        return(sum(weight / total * (1 + sum(p * m[nextState] for nextState, p in self.transitions[state].items()))
+                   for state, weight in weights.items()))
+
+    def distribution(self, target, nTurns, start=None):
+        """to compute the probability that target is first hit on turn k = 1..nTurns
+        start is a square or a dictionary of squares to probabilities at the start of the first turn; by default
+        the token starts in the target, weighted as in returnTime, giving the return time distribution"""
+        squares = self.targetSquares(target)
+        if start == None:
+            start = {state : self.pi[state] for state in range(len(self.transitions))
+                     if self.turnStarts[state] and self.squares[state] in squares}
+            total = sum(start.values())
+            start = {state : p / total for state, p in start.items()}
+        vector = {start : 1.0} if isinstance(start, int) else dict(start)
+
+        probabilities = []
+        for turn in range(nTurns):
+            hit, nextVector = 0, {}
+            while vector: # rolls of this turn
+                rolling = {}
+                for state, p in vector.items():
+                    for nextState, q in self.transitions[state].items():
+                        if self.squares[nextState] in squares:
+                            hit += p * q
+                        elif self.turnStarts[nextState]: # turn over
+                            nextVector[nextState] = nextVector.get(nextState, 0) + p * q
+                        else:
+                            rolling[nextState] = rolling.get(nextState, 0) + p * q
+                vector = rolling
+            probabilities.append(hit)
+            vector = nextVector
+        return(probabilities)
+
+
+firstPassages = {} # FirstPassage objects of the rules variants queried, by rules key
+
+def firstPassageFor(rules=None):
+    """function to return the (cached) FirstPassage object of a rules variant"""
+    key = rulesKey(rules)
+    if key not in firstPassages:
+        firstPassages[key] = FirstPassage(Board(rules) if rules != None else defaultBoard)
+    return(firstPassages[key])
+
+
+"""Hitting probabilities within k turns"""
+
+class Hitting:
+    """Class to store the per-turn operators of a board that avoid each target queried, for questions like "what is
+    the chance a token on square X hits my property set within the next k turns?"
+    targets are as for FirstPassage, and a token hits a target when a roll (including any card or "Go to Jail" move
+    it triggers) ends on one of its squares"""
+
+    def __init__(self, board=None):
+        """initialises the roll chain; the per-turn operators are built on first use of each target"""
+        self.board = board if board != None else defaultBoard
+        self.transitions, landings = self.board.transitionMatrix()
+        self.squares = self.board.stateSquares() # square of each state
+        self.turnStarts = self.board.turnStarts()
+        self.operators = {} # (hit probability, end of turn distribution if not hit) per start state, by target
+
+    def operator(self, squares):
+        """to build (or look up) the per-turn operator avoiding squares: for each state a turn starts in (a square,
+        or a turn in jail), the probability of hitting squares during the turn, and the probability of ending the
+        turn in each state without having hit them"""
+        key = frozenset(squares)
+        if key not in self.operators:
+            starts = set(self.turnStarts)
+            hits, ends = {}, {}
+            for start in self.turnStarts:
+                vector, hit, end = {start : 1.0}, 0, {}
+                while vector: # rolls of the turn
+                    rolling = {}
+                    for state, p in vector.items():
+                        for nextState, q in self.transitions[state].items():
+                            if self.squares[nextState] in key:
+                                hit += p * q
+                            elif nextState in starts: # turn over
+                                end[nextState] = end.get(nextState, 0) + p * q
+                            else:
+                                rolling[nextState] = rolling.get(nextState, 0) + p * q
+                    vector = rolling
+                hits[start] = hit
+                ends[start] = end
+            self.operators[key] = (hits, ends)
+        return(self.operators[key])
+
+    def within(self, target, nTurns, start=0):
+        """to compute the probability that a token starting its turn on start hits target within k turns, for
+        k = 1..nTurns; start is a square (index or label) or a dictionary of squares to probabilities"""
+        hits, ends = self.operator(targetSquares(self.board, target))
+        if isinstance(start, dict):
+            vector = {self.board.squareIndex.get(square, square) : p for square, p in start.items()}
+        else:
+            vector = {self.board.squareIndex.get(start, start) : 1.0}
+
+        probabilities, hit = [], 0
+        for turn in range(nTurns):
+            nextVector = {}
+            for square, p in vector.items():
+                hit += p * hits[square]
+                for nextSquare, q in ends[square].items():
+                    nextVector[nextSquare] = nextVector.get(nextSquare, 0) + p * q
+            probabilities.append(hit)
+            vector = nextVector
+        return(probabilities)
+
+
+hittings = {} # Hitting objects of the rules variants queried, by rules key
+
+def hitWithin(target, nTurns, start=0, rules=None):
+    """function to compute the probability that a token starting its turn on start hits target within k turns, for
+    k = 1..nTurns; the per-turn operators are cached per rules variant and target, so repeated queries are cheap"""
+    key = rulesKey(rules)
+    if key not in hittings:
+        hittings[key] = Hitting(Board(rules) if rules != None else defaultBoard)
+    return(hittings[key].within(target, nTurns, start))
+
+
+"""Sensitivity analysis"""
+
+def rulePerturbations(rules=None):
+    """function to list one-step perturbations of the rule parameters of a rules variant, as (label, overrides)
+    the number of dice, their sides, the doubles rule and the pile size are moved one step down and up (where the
+    result is a valid rule), and each distinct movement card is taken out of its pile in turn"""
+    rules = fullRules(rules)
+    lowest = {'nDice': 1, 'diceSides': 2, 'doublesToJail': 1,
+              'pileSize': max(len(rules['cChestCards']), len(rules['chanceCards']))}
+
+    perturbations = []
+    for name, minimum in lowest.items():
+        for step in (-1, 1):
+            if rules[name] + step >= minimum:
+                perturbations.append((f"{name} {step:+d}", {name: rules[name] + step}))
+    for name in ('cChestCards', 'chanceCards'):
+        for card in dict.fromkeys(rules[name]): # each distinct card once, in pile order
+            cards = list(rules[name])
+            cards.remove(card)
+            perturbations.append((f"{name} without {card}", {name: cards}))
+    return(perturbations)
+
+
+def vectorTimes(vector, transitions):
+    """function to multiply a row vector by a sparse transition matrix"""
+    result = [0] * len(transitions)
+    for state, row in enumerate(transitions):
+        p = vector[state]
+        if p:
+            for nextState, q in row.items():
+                result[nextState] += p * q
+    return(result)
+
+
+class Sensitivity:
+    """Class to store the factorised roll chain of a rules variant, for measuring how its landing percentages move
+    when each rule is perturbed; every perturbation reuses the one factorisation of the base chain
+    with P the base chain, pi its stationary distribution, Z = (I - P + 1 * pi) inverse and E = P' - P the change
+    a perturbation makes, the stationary distribution of P' solves pi' = pi + pi' * E * Z"""
+
+    def __init__(self, rules=None, perturbations=None):
+        """initialises the base chain and the perturbed boards; perturbations is a list of (label, overrides), by
+        default rulePerturbations(rules); they must keep the board and the jail policy of the base rules"""
+        self.rules = fullRules(rules)
+        self.perturbations = perturbations if perturbations != None else rulePerturbations(self.rules)
+        self.board = Board(self.rules)
+        self.variants = [Board(dict(self.rules, **overrides)) for label, overrides in self.perturbations]
+        for (label, overrides), variant in zip(self.perturbations, self.variants):
+            if variant.size != self.board.size or variant.jailStates != self.board.jailStates:
+                raise ValueError(f"Perturbation {label} changes the board or the jail states, which the sensitivity "
+                                 "analysis can't do")
+
+        # a state space with enough doubles layers for every board
+        self.layers = max(board.doublesLayers for board in [self.board] + self.variants)
+        self.transitions, self.landings = self.board.transitionMatrix(self.layers)
+        self.turnStarts = self.board.turnStarts(self.layers)
+        self.pi = stationaryDistribution(self.transitions)
+        self.landPercentages = landingPercentages(self.pi, self.landings, self.board.size, self.turnStarts)
+        n = len(self.transitions)
+
+        # factorising (I - P + 1 * pi) transposed, so that u * Z is found with one substitution
+        matrix = [[self.pi[state]] * n for state in range(n)]
+        for state, row in enumerate(self.transitions):
+            matrix[state][state] += 1
+            for nextState, p in row.items():
+                matrix[nextState][state] -= p
+        self.factorisation = luFactor(matrix)
+
+    def change(self, transitions):
+        """to compute the sparse rows of E, the change from the base transitions to the perturbed ones"""
+        rows = []
+        for row, baseRow in zip(transitions, self.transitions):
+            difference = dict(row)
+            for nextState, p in baseRow.items():
+                difference[nextState] = difference.get(nextState, 0) - p
+            rows.append({nextState : p for nextState, p in difference.items() if p != 0})
+        return(rows)
+
+    def perturb(self, variant, tolerance=1e-12, maxIterations=100):
+        """to compute how the landing percentages move when the base rules are replaced by those of variant
+        returns the derivative of the percentages along the path mixing the base rules into the variant's (the
+        first-order estimate of the change), the exact change, and the number of substitutions used for it; the
+        exact change is iterated from pi' = pi + pi' * E * Z, falling back to a fresh solve (None substitutions)
+        when the perturbation is too large for the iteration to converge"""
+        size = self.board.size
+        transitions, landings = variant.transitionMatrix(self.layers)
+        change = self.change(transitions)
+
+        # derivative: pi moves by pi * E * Z, and the expected landings of each state move by L' - L
+        dPi = luSolve(self.factorisation, vectorTimes(self.pi, change))
+        turns, dTurns = sum(self.pi[state] for state in self.turnStarts), sum(dPi[state] for state in self.turnStarts)
+        landCount = expectedLandings(self.pi, self.landings, size)
+        dLandCount = [a + b - c for a, b, c in zip(expectedLandings(dPi, self.landings, size),
+                                                   expectedLandings(self.pi, landings, size), landCount)]
+        derivative = array('d', [100 * (dCount / turns - count * dTurns / turns ** 2)
+                                 for count, dCount in zip(landCount, dLandCount)])
+
+        # exact change, iterating from the first-order estimate of pi'
+        pi = [a + b for a, b in zip(self.pi, dPi)]
+        iterations = 1
+        while iterations <= maxIterations:
+            nextPi = [a + b for a, b in zip(self.pi, luSolve(self.factorisation, vectorTimes(pi, change)))]
+            step = max(abs(a - b) for a, b in zip(nextPi, pi))
+            pi = nextPi
+            iterations += 1
+            if not step > tolerance: # also stops on nan, caught below
+                break
+        if not step <= tolerance:
+            pi, iterations = stationaryDistribution(transitions), None
+
+        delta = landingPercentages(pi, landings, size, self.turnStarts)
+        for square in range(0, size):
+            delta[square] -= self.landPercentages[square]
+        return(derivative, delta, iterations)
+
+    def analyse(self, tolerance=1e-12, maxIterations=100):
+        """to perturb the base rules by each of the perturbations, returning a dictionary per perturbation with its
+        label, rule overrides, derivative, exact change (delta) and substitutions used"""
+        results = []
+        for (label, overrides), variant in zip(self.perturbations, self.variants):
+            derivative, delta, iterations = self.perturb(variant, tolerance, maxIterations)
+            results.append({'label': label, 'rules': overrides, 'derivative': derivative, 'delta': delta,
+                            'iterations': iterations})
+        return(results)
+
+
+def sensitivity(rules=None, perturbations=None, top=5):
+    """function to run a sensitivity analysis of a rules variant and list, for each perturbation, the top squares
+    whose landing percentages move the most, as (label, [(square label, change in percentage points)])"""
+    analysis = Sensitivity(rules, perturbations)
+    positions = analysis.board.positions
+    moves = []
+    for result in analysis.analyse():
+        squares = sorted(range(0, analysis.board.size), key=lambda square: -abs(result['delta'][square]))[:top]
+        moves.append((result['label'], [(positions[square], result['delta'][square]) for square in squares]))
+    return(moves)
+
+
+"""Library API"""
+
+class LandingResult:
+    """Class to store the outcome of a landing run, for use by other modules instead of printed output"""
+
+    def __init__(self, counts, percentages, labels, rolls, elapsed, method):
+        """initialises the result; counts are the landings on each square (None for the exact solver, which
+        doesn't count anything), percentages the landing percentages per turn, labels the square labels, rolls the
+        number of rolls/turns simulated (None for the exact solver) and elapsed the run time in seconds"""
+        self.counts = counts
+        self.percentages = percentages
+        self.labels = labels
+        self.rolls = rolls
+        self.elapsed = elapsed
+        self.method = method
+
+    def rows(self):
+        """to return (square, label, percentage) tuples, in order from GO"""
+        return(list(zip(range(0, len(self.labels)), self.labels, self.percentages)))
+
+    def asDict(self):
+        """to return the result as a dictionary of plain lists and numbers, ready to be saved as JSON"""
+        return({'method': self.method, 'rolls': self.rolls, 'elapsed': self.elapsed, 'labels': list(self.labels),
+                'counts': self.counts.tolist() if self.counts != None else None,
+                'percentages': self.percentages.tolist()})
+
+
+methods = ('simulate', 'batch', 'parallel', 'exact') # ways landingDistribution can compute the distribution
+
+def landingDistribution(nRolls=rolls, method='simulate', seed=None, reshuffle=False, nWorkers=None):
+    """function to compute the landing distribution with one of methods, returning a LandingResult
+    'simulate' runs the single-token simulator (on a generator of its own seeded from seed, if given),
+    'batch' the NumPy batched engine, 'parallel' a pool of nWorkers processes and 'exact' the exact solver,
+    which ignores nRolls, seed and reshuffle"""
+    if method not in methods:
+        raise ValueError(f"unknown method {method!r}, expected one of {methods}")
+
+    start = time.perf_counter()
+    if method == 'exact':
+        counts, landPercentages, nRolls = None, solve(), None
+    else:
+        if method == 'simulate':
+            dice = DiceBuffer(random.Random(seed)) if seed != None else None # a private generator when seeded
+            counts = simulate(nRolls, reshuffle, dice)
+        elif method == 'batch':
+            counts = simulateBatch(nRolls, seed=seed, reshuffle=reshuffle)
+        else:
+            if reshuffle:
+                raise ValueError("the parallel simulation doesn't support reshuffled piles")
+            counts = simulateParallel(nRolls, seed, nWorkers)
+        landPercentages = percentages(counts, nRolls)
+    elapsed = time.perf_counter() - start
+
+    labels = tuple(positions[square] for square in range(0, len(landPercentages)))
+    return(LandingResult(counts, landPercentages, labels, nRolls, elapsed, method))
+
+
+if __name__ == "__main__": # guarded so that worker processes can import the module
+    start = time.perf_counter()
+    main(rolls)
+    print(f"Simulated {rolls} rolls in {time.perf_counter() - start:.3f} seconds.")